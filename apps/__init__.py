@@ -0,0 +1 @@
+# One module per menu entry, imported by registry.Registry when launched
@@ -0,0 +1,19 @@
+import calibration
+from ui import TEXT_FPS
+
+def run(ctx, cursor):
+    screen = ctx.screen
+    pool = ctx.pool
+    items = pool.group()
+    status = pool.label(ctx.font, "Let go of the joystick", 0, 5)
+    items.append(status)
+    # Nothing is scheduled while calibrating, refresh by hand
+    screen.show(items, TEXT_FPS)
+    screen.refresh()
+    ctx.badge.sleep(1)
+    x, y = ctx.hub.calibrate()
+    saved = calibration.save(ctx.store, x, y)
+    status.text = "Centre %d,%d%s" % (x, y, "" if saved else " (not saved)")
+    items.append(pool.label(ctx.font, "Press to exit.", 0, 20))
+    screen.refresh()
+    ctx.joy_button.wait_for()
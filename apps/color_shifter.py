@@ -0,0 +1,48 @@
+from hal import DISPLAY_WIDTH, DISPLAY_HEIGHT
+from sensorhub import X, Y, Z
+from STK8321 import tilt
+from ui import MENU_FPS, INPUT_DELAY
+from readout import Readout
+
+def run(ctx, cursor):
+    hub = ctx.hub
+    scheduler = ctx.scheduler
+    joy_button = ctx.joy_button
+    font = ctx.font
+    items = ctx.pool.group()
+    background = ctx.pool.rect(0, 0, DISPLAY_WIDTH, DISPLAY_HEIGHT, fill=0)
+    items.append(background)
+    x = Readout(font, 3, x=0, y=5, color=0x00FF00)
+    y = Readout(font, 3, x=0, y=15, color=0x00FF00)
+    z = Readout(font, 3, x=0, y=25, color=0x00FF00)
+    items.append(x.grid)
+    items.append(y.grid)
+    items.append(z.grid)
+    ctx.screen.show(items, MENU_FPS)
+    al = [0, 0, 0]
+    fill = None
+
+    def update():
+        nonlocal fill
+        if joy_button.pressed():
+            scheduler.stop()
+            return
+        for i in (X, Y, Z):
+            al[i] = tilt(hub.accel[i], 127) + 127
+
+        x.set(al[X])
+        y.set(al[Y])
+        z.set(al[Z])
+        color = (al[X] << 16) + (al[Y] << 8) + al[Z]
+        if color == fill:
+            return
+        fill = color
+        background.fill = color
+        x.color = 0xFFFFFF ^ color
+        y.color = 0xFFFFFF ^ color
+        z.color = 0xFFFFFF ^ color
+
+    # The colour follows every update
+    hub.frame_rate(1 / INPUT_DELAY)
+    scheduler.run(scheduler.task(update, INPUT_DELAY))
+    hub.frame_rate()
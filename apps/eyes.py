@@ -0,0 +1,82 @@
+import displayio
+import animation
+from sequencer import record
+from adafruit_display_shapes.circle import Circle
+from adafruit_display_shapes.rect import Rect
+from sensorhub import X, Y, Z
+from STK8321 import tilt
+from inputs import Button
+from ui import INPUT_DELAY
+
+FPS = 40
+COLORS = [0x000000, 0xFF0000, 0xffa000, 0xFFFF00, 0x00FF00, 0x0000FF, 0xFF00FF]
+
+def build(ctx):
+    # Made once and kept in ctx.cache, reused every time eyes runs
+    testdata = displayio.Group()
+    joy_pos = Circle(54, 38, 5, fill=COLORS[0])
+    acc_pos = Circle(116, 36, 5, fill=COLORS[0])
+    acc_z = Rect(156, 4, 4, 2, fill=0x808080)
+    assets = ctx.cache.get('assets')
+    if assets is None:
+        from assets import Assets
+        assets = ctx.cache['assets'] = Assets(ctx.assets_root)
+    try:
+        testdata.append(assets.tile_grid("eyebg", "/eyebg.bmp"))
+    except (OSError, ValueError) as e:
+        print(e)
+    testdata.append(joy_pos)
+    testdata.append(acc_pos)
+    #testdata.append(acc_z)
+    return testdata, joy_pos, acc_pos, acc_z
+
+def run(ctx, cursor):
+    hub = ctx.hub
+    badge = ctx.badge
+    scheduler = ctx.scheduler
+    joy_button = ctx.joy_button
+    sequencer = ctx.sequencer
+    store = ctx.store
+    eye_color = store.get('EYEC', 0) % len(COLORS)
+    if 'eyes' not in ctx.cache:
+        ctx.cache['eyes'] = build(ctx)
+    testdata, joy_pos, acc_pos, acc_z = ctx.cache['eyes']
+    joy_pos.fill = COLORS[eye_color]
+    acc_pos.fill = COLORS[eye_color]
+    ctx.screen.show(testdata, FPS)
+
+    # A wave a little under 0.3 rad a step, so 21 steps are exactly one
+    # turn and the pattern loops without a jump
+    wave = animation.Wave(ctx.led_count, animation.TURN // 21, animation.radians(.5) >> 8)
+    leds = sequencer.play(record(wave, ctx.led_count, 21, 25))
+    # The accelerometer dot moves every frame
+    hub.frame_rate(FPS)
+
+    def check_input():
+        # Short press for the next colour, long press to exit
+        nonlocal eye_color
+        press = joy_button.multi_pressed()
+        if press == Button.PRESSED_LONG:
+            scheduler.stop()
+        elif press:
+            eye_color = (eye_color+1)%len(COLORS)
+            store.set('EYEC', eye_color)
+            joy_pos.fill = COLORS[eye_color]
+            acc_pos.fill = COLORS[eye_color]
+
+    def draw():
+        if hub.joystick:
+            jp = hub.joy
+            joy_pos.x0 = 54 + jp[X]//32
+            joy_pos.y0 = 38 + jp[Y]//32
+        accel = hub.accelerometer
+        if accel:
+            al = hub.accel
+            acc_pos.fill = 0x00FF00 if not badge.button.value else 0x202020
+            acc_pos.x0 = 116 + tilt(al[X], 16, accel.one_g)
+            acc_pos.y0 = 36 + tilt(al[Y], 16, accel.one_g)
+            acc_z.y = 40 + tilt(al[Z], 16, accel.one_g)
+
+    scheduler.run(scheduler.task(draw, 1 / FPS), scheduler.task(check_input, INPUT_DELAY))
+    hub.frame_rate()
+    sequencer.stop(leds)
@@ -0,0 +1,174 @@
+import minesweeper
+from hal import DISPLAY_WIDTH, DISPLAY_HEIGHT
+from sensorhub import X, Y
+from gestures import SHAKE
+from inputs import Button
+from sequencer import hold
+from ui import Repeat, center_offset, MENU_FPS, INPUT_DELAY
+
+FPS = 20
+SIZES = (16, 10, 8)
+# Name and percentage of cells holding a mine
+DENSITIES = (("Easy", 10), ("Normal", 14), ("Hard", 20))
+
+def setup(ctx):
+    # Size and density are kept in the store for the next game
+    hub = ctx.hub
+    store = ctx.store
+    scheduler = ctx.scheduler
+    joy_button = ctx.joy_button
+    font = ctx.font
+    pool = ctx.pool
+    choice = [store.get('MSIZ', 0) % len(SIZES), store.get('MDEN', 1) % len(DENSITIES)]
+    items = pool.group()
+    items.append(pool.label(font, "Mines", center_offset("Mines"), 5, 0x00FF00))
+    size_label = pool.label(font, '', 0, 25, 0xFFFF00)
+    density_label = pool.label(font, '', 0, 40, 0xFFFF00)
+    score_label = pool.label(font, '', 0, 55, 0xFFFF00)
+    items.append(size_label)
+    items.append(density_label)
+    items.append(score_label)
+    items.append(pool.label(font, "Press to start.", 0, 70))
+    ctx.screen.show(items, MENU_FPS)
+
+    def show_choice():
+        size_label.text = "<> Cells: %dpx" % SIZES[choice[0]]
+        density_label.text = "^v Mines: %s" % DENSITIES[choice[1]][0]
+        score_label.text = "   Won %d of %d" % (store.get('MW%d' % choice[1], 0),
+            store.get('MP%d' % choice[1], 0))
+
+    show_choice()
+    start = False
+    size_repeat = Repeat()
+    density_repeat = Repeat()
+
+    def choose():
+        nonlocal start
+        press = joy_button.multi_pressed()
+        if press:
+            start = press == Button.PRESSED_SHORT
+            scheduler.stop()
+            return
+        now = ctx.badge.monotonic()
+        dx = size_repeat.step(hub.joy[X], now)
+        dy = density_repeat.step(hub.joy[Y], now)
+        if dx or dy:
+            choice[0] = (choice[0] + dx) % len(SIZES)
+            choice[1] = (choice[1] + dy) % len(DENSITIES)
+            store.set('MSIZ', choice[0])
+            store.set('MDEN', choice[1])
+            show_choice()
+
+    scheduler.run(scheduler.task(choose, INPUT_DELAY))
+    return start
+
+def run(ctx, cursor):
+    if not setup(ctx):
+        return
+    scheduler = ctx.scheduler
+    joy_button = ctx.joy_button
+    sequencer = ctx.sequencer
+    store = ctx.store
+    led_count = ctx.led_count
+    levels = bytearray(led_count)
+    font = ctx.font
+    pool = ctx.pool
+    size_index = store.get('MSIZ', 0) % len(SIZES)
+    density_index = store.get('MDEN', 1) % len(DENSITIES)
+    size = SIZES[size_index]
+    width = int(DISPLAY_WIDTH / size)
+    height = int(DISPLAY_HEIGHT / size)
+    area = width*height
+    count = max(1, area * DENSITIES[density_index][1] // 100)
+
+    board = minesweeper.Board(width, height)
+    board.place(count)
+    renderer = minesweeper.Renderer(board, size)
+
+    def show_count():
+        left = max(board.mines - board.flags, 0)
+        if board.mines > led_count:
+            left = (left*led_count + board.mines-1) // board.mines
+        for i in range(led_count):
+            levels[i] = 255 if i < left else 0
+        sequencer.play(hold(levels))
+
+    show_count()
+
+    items = pool.group()
+    items.append(renderer.grid)
+    items.append(cursor.pointer())
+    ctx.screen.show(items, FPS)
+
+    game_over = False
+    restart = False
+    banner = []
+    # Won and lost banners, made once and put back up after a new game
+    banners = {}
+
+    def shaken(kind):
+        nonlocal restart
+        restart = True
+
+    def new_game():
+        nonlocal game_over, restart
+        for layer in banner:
+            items.remove(layer)
+        banner.clear()
+        board.clear()
+        board.place(count)
+        renderer.update()
+        show_count()
+        game_over = False
+        restart = False
+
+    # Shake the badge for a new board
+    saved = ctx.subscribe({SHAKE: shaken})
+
+    def play():
+        nonlocal game_over
+        if restart:
+            new_game()
+        if game_over:
+            cursor.update()
+            if joy_button.pressed():
+                scheduler.stop()
+            return
+        press = joy_button.multi_pressed()
+        if press:
+            x = cursor.x // size
+            y = cursor.y // size
+            if x < width and y < height:
+                i = y*width + x
+                if press == Button.PRESSED_SHORT:
+                    lost = board.reveal(i) == -1
+                    if lost or board.won():
+                        board.expose()
+                        text = "You won!" if not lost else "You lost!"
+                        margin = center_offset(text)-3
+                        y = DISPLAY_HEIGHT//2-3
+                        if text not in banners:
+                            banners[text] = (pool.rect(margin, y-5, DISPLAY_WIDTH-2*margin-3, 16, fill=0x404040),
+                                pool.label(font, text, center_offset(text), y))
+                        banner.extend(banners[text])
+                        for layer in banner:
+                            items.append(layer)
+                        game_over = True
+                        # Games played and won at this density
+                        played = 'MP%d' % density_index
+                        store.set(played, store.get(played, 0) + 1)
+                        if not lost:
+                            won = 'MW%d' % density_index
+                            store.set(won, store.get(won, 0) + 1)
+                else:
+                    board.flag(i)
+                renderer.update()
+                show_count()
+                if game_over:
+                    return
+        cursor.update()
+
+    scheduler.run(scheduler.task(play, INPUT_DELAY))
+    ctx.subscribe(saved)
+
+    items.remove(cursor.ptr)
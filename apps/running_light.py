@@ -0,0 +1,41 @@
+import animation
+from inputs import Button
+from ui import TEXT_FPS, INPUT_DELAY
+from sequencer import record
+
+SPEEDS = [1000,500,250,100,50,25,10,1]
+
+def run(ctx, cursor):
+    pool = ctx.pool
+    items = pool.group()
+    items.append(pool.label(ctx.font, "Short press for speed.", 0, 5))
+    items.append(pool.label(ctx.font, "Long press to exit.", 0, 20))
+    ctx.screen.show(items, TEXT_FPS)
+    sequencer = ctx.sequencer
+    count = ctx.led_count
+    store = ctx.store
+    scheduler = ctx.scheduler
+    joy_button = ctx.joy_button
+    speed = store.get('RLSP', 0) % len(SPEEDS)
+
+    def chase():
+        # One key per LED, each held for the current speed
+        return record(animation.Chase(count), count, count, SPEEDS[speed], smooth=False)
+
+    # Start from the LED that was lit when it last ran
+    leds = sequencer.play(chase(), key=ctx.cache.get('light', 0))
+
+    def check_input():
+        # Short press for the next speed, long press to exit
+        nonlocal speed, leds
+        press = joy_button.multi_pressed()
+        if press == Button.PRESSED_LONG:
+            scheduler.stop()
+        elif press:
+            speed = (speed+1)%len(SPEEDS)
+            store.set('RLSP', speed)
+            leds = sequencer.play(chase(), key=leds.key)
+
+    scheduler.run(scheduler.task(check_input, INPUT_DELAY))
+    ctx.cache['light'] = leds.key
+    sequencer.stop(leds)
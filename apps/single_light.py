@@ -0,0 +1,12 @@
+from sequencer import hold
+
+def run(ctx, cursor):
+    light = ctx.cache.get('light', 0)
+    levels = bytearray(ctx.led_count)
+    for i in range(ctx.led_count):
+        if i == light:
+            levels[i] = 100
+        else:
+            levels[i] = 5
+    ctx.sequencer.play(hold(levels))
+    ctx.cache['light'] = (light+1) % ctx.led_count
@@ -1,504 +1,317 @@
-import board
-import busio
+import hal
+from timeline import Timeline
+
+badge = hal.init()
+# Where the time and heap go between power on and the menu being up
+timeline = Timeline(badge.monotonic)
+timeline.mark('hal')
+
 import displayio
-import time
-import math
-import random
-import struct
-import binascii
 import terminalio
-from digitalio import DigitalInOut, Direction, Pull
-from STK8321 import STK8321
-from IS31FL3218 import IS31FL3218
-from joystick import Joystick
-from adafruit_st7735r import ST7735R
-from adafruit_display_shapes.circle import Circle
-from adafruit_display_shapes.rect import Rect
+from sensorhub import SensorHub, X, Y, BUTTON
+from STK8321 import ONE_G
+from scheduler import Scheduler
+from screen import Screen
+from idle import Idle
+from inputs import Input, Button
+from gestures import Gestures, TILT_FORWARD, TILT_BACK
+from registry import Context, Registry
+from sequencer import Sequencer, sweep
+from i2cbus import Bus
+from store import Store
+from pool import Pool
+from heap import Heap
+from ui import Cursor, Repeat, center_offset, MENU_FPS
 from adafruit_display_text.label import Label
-from collections import OrderedDict
-
-btn = DigitalInOut(board.GP21)
-btn.direction = Direction.INPUT
-btn.pull = Pull.UP
-
-
-DISPLAY_WIDTH = 160
-DISPLAY_HEIGHT = 80
 
-JOY_MIN = -512
-JOY_MAX = 512
-ACCEL_MIN = -2047
-ACCEL_MAX = 2047
-
-displayio.release_displays()
-spi = busio.SPI(board.GP2, board.GP3, board.GP4)
-displayio.release_displays()
-display_bus = displayio.FourWire(spi, command=board.GP5, chip_select=board.GP7, reset=board.GP6)
-display = ST7735R(display_bus, width=DISPLAY_WIDTH, height=DISPLAY_HEIGHT, colstart=24, rotation=270, backlight_pin=board.GP8)
+display = badge.display
+monotonic = badge.monotonic
+sleep = badge.sleep
 
 font = terminalio.FONT
 
-i2c = busio.I2C(board.GP17, board.GP16)
-
-INPUT_DELAY = 0.05
+# Button samples per second. The joystick's button only comes with its
+# position, so the joystick is read this often too.
+INPUT_RATE = 100
+FRAME_TIME = 0.025
+# Seconds without use before dimming and before sleeping
+IDLE_DIM = 30
+IDLE_SLEEP = 120
+# Accelerometer filter bandwidth in Hz, taps need the 62.5 Hz output rate
+ACCEL_BANDWIDTH = 31.25
 LED_COUNT = 12
 
-try:
-    joy = Joystick(i2c)
-except RuntimeError as e:
-    print(e)
-    joy = None
-
-try:
-    led_controller = IS31FL3218(i2c)
-    led_controller.enableLeds([
-        True,  True,  True,  True,  True,  True,
-        True,  True,  True,  True,  True,  True,
-        False, False, False, False, False, False])
-    for i in range(13):
-        if i>0:
-            led_controller.setLed(i-1, 0)
-        if i<13:
-            led_controller.setLed(i, 255)
-        led_controller.refresh()
-except RuntimeError as e:
-    print(e)
-    led_controller = None
-
-try:
-    accel = STK8321(i2c)
-    accel.enableMotionInterrupt()
-    print(accel.get_values())
-except RuntimeError as e:
-    print(e)
-    accel = None
-
-class Button:
-    PRESSED_SHORT = 1
-    PRESSED_LONG = 2
-
-    def __init__(self, joy):
-        self.joy = joy
-        self.registered = False
-        self.waiting_for_release = False
-        self.long_press_delay = 0.3
-
-    def pressed(self):
-        self._read()
-        if self.registered:
-            self.registered = False
-            return True
-        return False
-
-    def wait_for(self):
-        while not self.pressed():
-            time.sleep(.001)
-
-    def multi_pressed(self):
-        self._read()
-        if self.registered:
-            diff = (time.monotonic() - self.registered)
-            if self._depressed():
-                if diff >= self.long_press_delay:
-                    self.registered = False
-                    return Button.PRESSED_LONG
-            else:
-                self.registered = False
-                if diff < self.long_press_delay:
-                    return Button.PRESSED_SHORT
-                else:
-                    return Button.PRESSED_LONG
-        return False
-
-    def _read(self):
-        if self._depressed():
-            if not self.registered and not self.waiting_for_release:
-                self.waiting_for_release = True
-                self.registered = time.monotonic()
-
-    def _depressed(self):
-        if not self.joy:
-            return False
-        pressed = not self.joy.getPos()['Button']
-        if not pressed:
-            self.waiting_for_release = False
-        return pressed
-
-joy_button = Button(joy)
-
-
-def eyes(cursor):
-    eye_color = 0
-    colors = [0x000000, 0xFF0000, 0xffa000, 0xFFFF00, 0x00FF00, 0x0000FF, 0xFF00FF]
-    # Make the display context
-    testdata = displayio.Group()
-    display.show(testdata)
-
-    joy_pos = Circle(54, 38, 5, fill=colors[eye_color])
-    acc_pos = Circle(116, 36, 5, fill=colors[eye_color])
-    acc_z = Rect(156, 4, 4, 2, fill=0x808080)
-    bitmap = displayio.OnDiskBitmap("/eyebg.bmp")
-    tile_grid = displayio.TileGrid(bitmap, pixel_shader=bitmap.pixel_shader)
-    testdata.append(tile_grid)
-    testdata.append(joy_pos)
-    testdata.append(acc_pos)
-    #testdata.append(acc_z)
-
-
-    c=0
-    running = True
-    if joy:
-        jp = joy.getPos()
-
-    while running:
-        if led_controller:     
-            for i in range(12):
-                m = 127.0
-                v = int(m+m*math.sin(c+i*.5))
-                led_controller.setLed(i, v)
-            c+=.3
-            if c > 2* math.pi:
-                c -= 2*math.pi
-            led_controller.refresh()
-        if joy:
-            jp = joy.getPos()
-            press = joy_button.multi_pressed()
-            if press:
-                if press == Button.PRESSED_SHORT:
-                    eye_color = (eye_color+1)%len(colors)
-                    joy_pos.fill = colors[eye_color]
-                    acc_pos.fill = colors[eye_color]
-                else:
-                    running = False
-            joy_pos.x0 = 54 + jp['X']//32
-            joy_pos.y0 = 38 + jp['Y']//32
-        if accel:
-            al = accel.get_values()
-            acc_pos.fill = 0x00FF00 if not btn.value else 0x202020
-            acc_pos.x0 = 116 + al['X']//64
-            acc_pos.y0 = 36 + al['Y']//64
-            acc_z.y = 40 + al['Z']//64
-        time.sleep(.025)
-
-
-eyes(None)
-
-
-
-class Cursor:
-    def __init__(self, joy):
-        self.joy = joy
-        self.x = DISPLAY_WIDTH // 2
-        self.y = DISPLAY_HEIGHT // 2
-        self.size = 3
-        self.ptr = Circle(self.x, self.y, self.size, fill=0xFFFFFF)
-        self.rate = 5
-
-    def update(self):
-        pos = self.joy.getPos()
-        self.x += int((pos['X'] / JOY_MAX) * self.rate)
-        self.x = min(self.x, DISPLAY_WIDTH)
-        self.x = max(self.x, 0)
-        self.y += int((pos['Y'] / JOY_MAX) * self.rate)
-        self.y = min(self.y, DISPLAY_HEIGHT)
-        self.y = max(self.y, 0)
-
-        self.ptr.x0 = self.x - self.size
-        self.ptr.y0 = self.y - self.size
-
-def center_offset(text):
-    return (DISPLAY_WIDTH - len(text) * 6) // 2
+# I2C addresses of the joystick, accelerometer and LED driver
+DEVICES = (0x42, 0x0f, 0x54)
+
+timeline.mark('imports')
+
+# Every driver goes through this, bring_up() sets its clock
+i2c = Bus(badge.i2c, badge.ticks_us, reopen=badge.reopen_i2c, recover=badge.recover_i2c)
+
+# The devices are probed by bring_up() once the menu is showing
+hub = SensorHub(i2c, joy_rate=INPUT_RATE, clock=monotonic, sleep=sleep,
+    accel_bandwidth=ACCEL_BANDWIDTH, probe=False)
+
+# Settings and scores, written out when the badge dims and when an app exits
+store = Store(badge.store_backend())
+
+scheduler = Scheduler(FRAME_TIME, badge.ticks_ms, sleep)
+scheduler.every(hub.poll, 1 / INPUT_RATE)
+
+screen = Screen(display, MENU_FPS, monotonic)
+screen.attach(scheduler)
+
+# Heap collected just after a refresh, or while the scheduler waits, rather
+# than whenever an allocation fails mid frame
+heap = Heap(badge.ticks_us)
+scheduler.every(heap.check, after=True)
+scheduler.spare = heap.spare
+
+led_controller = None
+# Plays LED patterns from a background task, the driver is handed over
+# once bring_up() has found it
+sequencer = Sequencer(None, badge.ticks_ms)
+sequencer.attach(scheduler)
+
+# Shake and tap are only looked for while the motion interrupt on GP21
+# is raised, it's active high. The rate is what the probe will set the
+# accelerometer to.
+gestures = Gestures(2 * ACCEL_BANDWIDTH, ONE_G, lambda: badge.button.value)
+scheduler.every(gestures.dispatch)
+
+def subscribe(handlers):
+    # {gesture: fn or None}, returns what was replaced to put back later
+    old = {}
+    for kind in handlers:
+        old[kind] = gestures.on(kind, handlers[kind])
+    return old
+
+profiler = None
+if badge.profile:
+    from profiler import Profiler
+    profiler = Profiler(clock=monotonic)
+    scheduler.profiler = profiler
+    if badge.profile == "overlay":
+        scheduler.every(lambda: profiler.overlay(display, font), 1.0)
+
+# Button events sampled at INPUT_RATE from the joystick button, timed by
+# the joystick sample it showed up in. GP21 isn't a source: it's the
+# accelerometer's motion interrupt, read by gestures.
+inputs = Input(monotonic, INPUT_RATE)
+JOY_BUTTON = inputs.add(lambda: not hub.joy[BUTTON], lambda: hub.joy_time, 0)
+scheduler.every(inputs.poll, inputs.period)
+
+joy_button = Button(inputs, JOY_BUTTON, sleep, hub.poll)
+
+def woken():
+    # The press that woke the badge shouldn't also act in the app
+    joy_button.flush()
+
+idle = Idle(badge, hub, None, IDLE_DIM, IDLE_SLEEP)
+idle.scheduler = scheduler
+idle.on_wake = woken
+idle.on_dim = store.flush
+scheduler.every(idle.check, 0.25)
+
+# What apps get handed, see lib/registry.py
+ctx = Context(badge=badge, hub=hub, screen=screen, scheduler=scheduler,
+    gestures=gestures, subscribe=subscribe, store=store, joy_button=joy_button, font=font,
+    sequencer=sequencer, led_count=LED_COUNT,
+    # Groups, shapes and labels apps reuse instead of allocating
+    pool=Pool(),
+    # Images converted by tools/convert_assets.py, loaded into RAM when used
+    assets_root=hal.setting('BADGE_ASSETS', '/assets'))
+# The shapes stay loaded along with the pooled objects made from them
+# Import times and heap use of each app go to serial with BADGE_PROFILE
+registry = Registry(ctx, clock=monotonic, heap=heap, resident=('adafruit_display_shapes',),
+    out=print if badge.profile else None)
+
+def bring_up():
+    # Device probing one step per frame from a background task, so the
+    # menu is up and taking input meanwhile. The LED sweep is a pattern
+    # left playing on the sequencer.
+    global led_controller
+    # Let the first frame out before anything else
+    yield
+    print("i2c at %s Hz" % i2c.negotiate(DEVICES))
+    timeline.mark('i2c')
+    yield
+    if hub.probe_joystick():
+        import calibration
+        offsets = calibration.load(store)
+        if offsets:
+            hub.joy_center[X], hub.joy_center[Y] = offsets
+    timeline.mark('joystick')
+    yield
+
+    accel = hub.probe_accelerometer()
+    if accel:
+        accel.enableMotionInterrupt()
+        accel.listener = gestures.feed
+        print(accel.get_values())
+    timeline.mark('accelerometer')
+    yield
+
+    from IS31FL3218 import IS31FL3218, CHANNELS
+    import animation
+    try:
+        leds = IS31FL3218(i2c)
+        leds.curve = animation.GAMMA
+        # All 18 channels, the sequencer can drive any of them
+        leds.enableLeds([True] * CHANNELS)
+    except RuntimeError as e:
+        print(e)
+        leds = None
+    if profiler:
+        for driver in (hub.joystick, hub.accelerometer, leds):
+            profiler.wrap(driver)
+    if leds:
+        led_controller = sequencer.leds = idle.leds = leds
+        sequencer.play(sweep(LED_COUNT))
+    timeline.mark('leds')
+    timeline.first_frame = screen.first_frame
+    timeline.report()
+
+booting = bring_up()
+
+def boot_step():
+    try:
+        next(booting)
+    except StopIteration:
+        scheduler.cancel(boot_task)
+
+boot_task = scheduler.every(boot_step)
+
+def finish_boot():
+    # Runs what's left of bring_up() straight away
+    for _ in booting:
+        pass
+    scheduler.cancel(boot_task)
+
+MENU_ROWS = 4
+MENU_COLOR = 0xFFFF00
+MENU_HIGHLIGHT = 0xFFFFFF
 
 class Menu:
+    # The group and row labels are built on first use and kept, scrolling
+    # only rewrites the row texts and moving the selection only recolours
+    # two rows. An option can be another menu's run method to nest menus.
     def __init__(self, title, options):
         self.title = title
-        self.options = options
+        # (name, fn) pairs in menu order
+        self.options = dict(options)
+        self.keys = [name for name, fn in options]
         self.labels = []
         self.y_off = 20
         self.y_size = 15
         self.group = None
-        
-    def display(self, cursor):
-        font = terminalio.FONT
-        items = displayio.Group()
-        items.append(cursor.ptr)
-        items.append(Label(font, text=self.title, x=center_offset(self.title), y=5, color=0x00FF00))
-        i = 0
-        for k in self.options:
-            if i >= 5:
-                # +5 for the y offset to position the text correctly
-                l = Label(font, text=k, x=80, y=self.y_off+(i-5)*self.y_size+5, color=0xFFFF00)
-                self.labels.append(l)
-                items.append(l)
-            else:
+        self.top = 0
+        self.highlight = None
+        self.selected = 0
+        self.repeat = Repeat()
+        # Seconds from the press being sampled to the app being called
+        self.latency = None
+
+    def display(self):
+        if self.group is None:
+            items = displayio.Group()
+            items.append(Label(font, text=self.title, x=center_offset(self.title), y=5, color=0x00FF00))
+            for i in range(min(MENU_ROWS, len(self.keys))):
                 # +5 for the y offset to position the text correctly
-                l = Label(font, text=k, x=80, y=self.y_off+(i-5)*self.y_size+5, color=0xFFFF00)
-                l = Label(font, text=k, x=0, y=self.y_off+i*self.y_size+5, color=0xFFFF00)
+                l = Label(font, text=self.keys[i], x=0, y=self.y_off+i*self.y_size+5, color=MENU_COLOR)
                 self.labels.append(l)
                 items.append(l)
-            i += 1
-
-        display.show(items)
-        self.group = items
-
-    def run(self):
-        cursor = Cursor(joy)
-        self.display(cursor)
-        while joy_button.pressed():
-            time.sleep(INPUT_DELAY)
-        while True:
-            time.sleep(INPUT_DELAY)
-            cursor.update()
+            self.group = items
+        screen.show(self.group, MENU_FPS)
+
+    def scroll(self, top):
+        top = max(0, min(top, len(self.keys) - len(self.labels)))
+        if top != self.top:
+            self.top = top
+            for i in range(len(self.labels)):
+                self.labels[i].text = self.keys[top+i]
+
+    def hover(self, row):
+        if row == self.highlight:
+            return
+        if self.highlight is not None:
+            self.labels[self.highlight].color = MENU_COLOR
+        if row is not None:
+            self.labels[row].color = MENU_HIGHLIGHT
+        self.highlight = row
+
+    def select(self, i):
+        i = max(0, min(i, len(self.keys) - 1))
+        self.selected = i
+        if i < self.top:
+            self.scroll(i)
+        elif i >= self.top + len(self.labels):
+            self.scroll(i - len(self.labels) + 1)
+        self.hover(i - self.top)
+
+    def run(self, cursor=None):
+        # The cursor isn't drawn in menus but is handed on to apps
+        if cursor is None:
+            cursor = Cursor(hub)
+        self.display()
+        self.select(self.selected)
+        hub.poll()
+        # Swallow the press that launched this menu
+        joy_button.flush()
+
+        def tilted(kind):
+            self.select(self.selected + (1 if kind == TILT_FORWARD else -1))
+
+        scrolling = {TILT_FORWARD: tilted, TILT_BACK: tilted}
+        saved = subscribe(scrolling)
+
+        def step():
+            d = self.repeat.step(hub.joy[Y], monotonic())
+            if d:
+                self.select(self.selected + d)
             if joy_button.pressed():
-                if cursor.x < 80 and cursor.y >= self.y_off:
-                    i = int((cursor.y - self.y_off)/self.y_size)
-
-                    if i < len(self.options):
-                        fn = self.options[list(self.options)[i]]
-                        if fn == None:
-                            break
-                        else:
-                            self.group.remove(cursor.ptr)
-                            fn(cursor)
-                            self.group.append(cursor.ptr)
-                            display.show(self.group)
-
-
-
-LED_COUNT = 12
-
-def turn_off_lights():
-    for i in range(LED_COUNT):
-        led_controller.setLed(i, 0)
-    led_controller.refresh()
-
-
-light = 0
-def single_light(cursor):
-    global light
-    for i in range(LED_COUNT):
-        if i == light:
-            led_controller.setLed(i,100)
-        else:
-            led_controller.setLed(i,5)
-    led_controller.refresh()
-    light = (light+1) % LED_COUNT
-    
-
-def running_light(cursor):
-    global light
-    items = displayio.Group()
-    items.append(Label(font, text="Short press for speed.", x=0, y=5, color=0xFFFFFF))
-    items.append(Label(font, text="Long press to exit.", x=0, y=20, color=0xFFFFFF))
-    display.show(items)
-    speed = 0
-    speeds = [1000,500,250,100,50,25,10,1]
-    #while not joy_button.pressed():
-    running = True
-    while running:
-        for i in range(LED_COUNT):
-            if i == light:
-                led_controller.setLed(i,100)
-            else:
-                led_controller.setLed(i,5)
-        led_controller.refresh()
-        light = (light+1) % LED_COUNT
-        left = speeds[speed]/1000.0
-        while left:
-            to_sleep = min(INPUT_DELAY, left)
-            time.sleep(to_sleep)
-            left -= to_sleep
-            press = joy_button.multi_pressed()
-            if press:
-                if press == Button.PRESSED_SHORT:
-                    speed = (speed+1)%len(speeds)
-                else:
-                    running = False
-                break
-
-
-def mines(cursor):
-    size = 16
-    width = int(DISPLAY_WIDTH / size)
-    height = int(DISPLAY_HEIGHT / size)
-    area = width*height
-    count = 7
-    non_mines = area - count
-    x_offset = 5  # text offset
-    y_offset = 6  # text offset
-
-    mines = []
-
-    for i in range(LED_COUNT):
-        if i < count:
-            led_controller.setLed(i, 255)
-        else:
-            led_controller.setLed(i, 0)
-    led_controller.refresh()
-
-    class Location:
-        def __init__(self, x, y, is_mine):
-            self.neighbors = 0
-            self.mine = is_mine
-            self.x = x
-            self.y = y
-            self.rect = Rect(x*size, y*size, size-1, size-1, fill=0x808080)
-            self.revealed = False
-            self.flagged = False
-
-        def increment_count(self):
-            self.neighbors += 1
-
-        def flag(self):
-            nonlocal count
-            if self.revealed:
-                return
-            if self.flagged:
-                self.rect.fill = 0x808080
-                self.flagged = False
-                if count >= 0:
-                    led_controller.setLed(count, 255)
-                count += 1
-            else:
-                self.rect.fill = 0xFF8080
-                self.flagged = True
-                count -= 1
-                if count >= 0:
-                    led_controller.setLed(count, 0)
-            led_controller.refresh()
-
-        def reveal(self, items):
-            to_reveal = []
-            revealed = 0
-            if not self.revealed:
-                if self.flagged:
-                    self.flag()
-                if self.mine:
-                    # boom
-                    revealed = -1
-                    self.rect.fill = 0xFF0000
-                else:
-                    self.revealed = True
-                    revealed = 1
-                    self.rect.fill = 0x202020
-                    if self.neighbors > 0:
-                        items.append(Label(font, text=str(self.neighbors), x=self.x*size+x_offset, y=self.y*size+y_offset, color=0x00FF00))
-                    else:
-                        for x in [-1, 0, 1]:
-                            for y in [-1, 0, 1]:
-                                newx = self.x + x
-                                newy = self.y + y
-                                if newx >= 0 and newx < width and newy >= 0 and newy < height:
-                                    to_reveal.append(mines[newx][newy])
-            return revealed, to_reveal
-                    
-
-    items = displayio.Group()
-
-    for x in range(width):
-        col = []
-        for y in range(height):
-            col.append(Location(x, y, False))
-        mines.append(col)
-
-    available = list(range(area))
-    for n in range(count):
-        loc = random.choice(available)
-        available.remove(loc)
-        x = int(loc % width)
-        y = int(loc / width)
-        mines[x][y] = Location(x, y, True)
-
-    for col in mines:
-        for item in col:
-            items.append(item.rect)
-            if item.mine:
-                for x in [-1, 0, 1]:
-                    for y in [-1, 0, 1]:
-                        newx = item.x + x
-                        newy = item.y + y
-                        if newx >= 0 and newx < width and newy >= 0 and newy < height:
-                            mines[newx][newy].increment_count()
-
-    items.append(cursor.ptr)
-    display.show(items)
-
-    while True:
-        press = joy_button.multi_pressed()
-        if press:
-            x = cursor.x // size
-            y = cursor.y // size
-            if x < width and y < height:
-                if press == Button.PRESSED_SHORT:
-                    x = cursor.x // size
-                    y = cursor.y // size
-                    if x < width and y < height:
-                        to_reveal = [mines[x][y]]
-                    while to_reveal:
-                        item = to_reveal.pop()
-                        revealed, reveal_mines = item.reveal(items)
-                        if revealed == -1:
-                            non_mines = -1
-                            break
-                        non_mines -= revealed
-                        to_reveal += reveal_mines
-                    if non_mines <= 0:
-                        for cols in mines:
-                            for mine in cols:
-                                mine.reveal(items)
-                        text = "You won!" if non_mines == 0 else "You lost!"
-                        margin = center_offset(text)-3
-                        y = DISPLAY_HEIGHT//2-3
-                        items.append(Rect(margin, y-5, DISPLAY_WIDTH-2*margin-3, 16, fill=0x404040))
-                        items.append(Label(font, text=text, x=center_offset(text), y=y, color=0xFFFFFF))
-                        while not joy_button.pressed():
-                            time.sleep(INPUT_DELAY)
-                            cursor.update()
-                        break
+                fn = self.options[self.keys[self.selected]]
+                if fn == None:
+                    scheduler.stop()
                 else:
-                    mines[x][y].flag()
-        time.sleep(INPUT_DELAY)
-        cursor.update()
-
-    items.remove(cursor.ptr)
-
-
-def color_shifter(cursor):
-    items = displayio.Group()
-    background = Rect(0, 0, DISPLAY_WIDTH, DISPLAY_HEIGHT, fill=0)
-    items.append(background)
-    al = accel.get_values()
-    x = Label(font, text='', x=0, y=5, color=0x00FF00)
-    y = Label(font, text='', x=0, y=15, color=0x00FF00)
-    z = Label(font, text='', x=0, y=25, color=0x00FF00)
-    items.append(x)
-    items.append(y)
-    items.append(z)
-    display.show(items)
-    while not joy_button.pressed():
-        al = accel.get_values()
-        for i in ['X', 'Y', 'Z']:
-            if al[i] >= 0:
-                al[i] = min(al[i], 1024) // 8
-            else:
-                al[i] = max(al[i], -1016) // 8
-            al[i] += 127
-
-        x.text = str(al['X'])
-        y.text = str(al['Y'])
-        z.text = str(al['Z'])
-        background.fill = (al['X'] << 16) + (al['Y'] << 8) + al['Z']
-        x.color = 0xFFFFFF ^ background.fill
-        y.color = 0xFFFFFF ^ background.fill
-        z.color = 0xFFFFFF ^ background.fill
-        time.sleep(INPUT_DELAY)
-
-main_menu = Menu("BSidesSLC 2022", OrderedDict([
-    ("Eyes", eyes),
-    ("Mines", mines),
-    ("Running LED", running_light),        
-    #("Single LED", single_light),
-    ("Color Shifter", color_shifter),
-]))
-
-main_menu.run()
+                    self.latency = monotonic() - joy_button.press_time
+                    if profiler:
+                        print("%s: %d ms from press" % (self.keys[self.selected], self.latency * 1000))
+                        profiler.start_app(self.keys[self.selected])
+                    screen.reset()
+                    subscribe({TILT_FORWARD: None, TILT_BACK: None})
+                    gestures.clear()
+                    fn(cursor)
+                    # Whatever the app changed, before the menu is back on screen
+                    store.flush()
+                    subscribe(scrolling)
+                    if profiler:
+                        print("%s: %d frames at %d fps, %d missed" % (self.keys[self.selected],
+                            screen.frames, screen.fps, screen.missed()))
+                        profiler.start_app(self.title)
+                        if badge.profile == "serial":
+                            profiler.dump()
+                    screen.show(self.group, MENU_FPS)
+
+        scheduler.run(scheduler.task(step))
+        subscribe(saved)
+
+
+
+main_menu = Menu("BSidesSLC 2022", (
+    ("Eyes", registry.entry('eyes')),
+    ("Mines", registry.entry('mines')),
+    ("Running LED", registry.entry('running_light')),
+    #("Single LED", registry.entry('single_light')),
+    ("Color Shifter", registry.entry('color_shifter')),
+    ("Calibrate", registry.entry('calibrate')),
+))
+
+timeline.mark('menu')
+
+def main():
+    main_menu.run()
+
+if __name__ == "__main__":
+    main()
@@ -1,31 +1,108 @@
+from hal import i2c_device
+
+CHANNELS = 18
+
 class IS31FL3218:
     def __init__(self, i2c, address=0x54):
-        import adafruit_bus_device.i2c_device as i2c_device
         try:
-            self.i2c = i2c_device.I2CDevice(i2c, address)
+            # Auto-increments, so register writes can be merged into bursts
+            self.i2c = i2c_device(i2c, address, True)
         except ValueError as e:
             print(e)
             raise RuntimeError('Failed to find LED Driver IS31FL3218!')
 
+        # frame[0] is scratch space for the register address, frame[n+1]
+        # holds the PWM value of channel n so a dirty span can be written
+        # as one auto-increment burst straight out of the buffer.
+        self.frame = bytearray(CHANNELS + 1)
+        self.view = memoryview(self.frame)
+        # Values as given to set(), so the brightness can be changed later
+        self.values = bytearray(CHANNELS)
+        self.brightness = 255
+        self.dirty_lo = CHANNELS
+        self.dirty_hi = -1
+        # Optional 256 entry brightness to PWM table, e.g. animation.GAMMA
+        self.curve = None
+
         self.reset()
         self.setEnabled(True)
 
     def reset(self):
         with self.i2c:
             self.i2c.write(bytes([0x17, 0]))
+        for i in range(CHANNELS + 1):
+            self.frame[i] = 0
+        for i in range(CHANNELS):
+            self.values[i] = 0
+        self.dirty_lo = CHANNELS
+        self.dirty_hi = -1
+
+    def level(self, value):
+        if self.brightness < 255:
+            value = value * self.brightness // 255
+        if self.curve is not None:
+            return self.curve[value]
+        return value // 8
 
     def setLed(self, led, value):
-        value //= 8
+        self.values[led] = value
+        value = self.level(value)
+        self.frame[led+1] = value
         with self.i2c:
             self.i2c.write(bytes([led+1, value]))
 
-    def enableLeds(self, led_list):
-        for i in range(3):
-            v = 0
-            for j in range(6):
-                if led_list[i*6+j]:
-                    v |= (1<<j)
+    def set(self, led, value):
+        self.values[led] = value
+        value = self.level(value)
+        if self.frame[led+1] != value:
+            self.frame[led+1] = value
+            if led < self.dirty_lo:
+                self.dirty_lo = led
+            if led > self.dirty_hi:
+                self.dirty_hi = led
+
+    def set_frame(self, values, start=0):
+        for i in range(len(values)):
+            self.set(start+i, values[i])
+
+    def fill(self, value, count=CHANNELS):
+        for i in range(count):
+            self.set(i, value)
+
+    def set_brightness(self, brightness):
+        # Scales every channel, 0 to 255; takes effect on the next show()
+        self.brightness = brightness
+        for i in range(CHANNELS):
+            self.set(i, self.values[i])
+
+    def show(self):
+        lo = self.dirty_lo
+        hi = self.dirty_hi
+        if hi < lo:
+            return
+        # Borrow the byte in front of the span for the start register and
+        # put the channel value back once the burst is out.
+        saved = self.frame[lo]
+        self.frame[lo] = lo + 1
+        try:
             with self.i2c:
+                self.i2c.write(self.view[lo:hi+2])
+                self.i2c.write(b'\x16\x00')
+        finally:
+            # On a bus error the span stays dirty for the next show()
+            self.frame[lo] = saved
+        self.dirty_lo = CHANNELS
+        self.dirty_hi = -1
+
+    def enableLeds(self, led_list):
+        # The three control registers are consecutive, a bus manager
+        # sends them as one burst
+        with self.i2c:
+            for i in range(3):
+                v = 0
+                for j in range(6):
+                    if led_list[i*6+j]:
+                        v |= (1<<j)
                 self.i2c.write(bytes([0x13+i, v]))
 
     def refresh(self):
@@ -1,8 +1,50 @@
+from array import array
+from hal import i2c_device
+
+# Indexes into the buffers filled by readinto()
+X = 0
+Y = 1
+Z = 2
+
+# Counts per g at each range, and the RANGESEL value for it
+ONE_G = 1024
+RANGES = {2: (0x03, 1024), 4: (0x05, 512), 8: (0x08, 256)}
+# Filter bandwidths in Hz for BWSEL 0x08 up; output rate is twice this
+BANDWIDTHS = (7.81, 15.63, 31.25, 62.5, 125, 250, 500, 1000)
+FIFO_FRAMES = 32
+FIFO_STREAM = 0x80
+
+# orientation() results, the axis pointing up
+X_UP = 0
+X_DOWN = 1
+Y_UP = 2
+Y_DOWN = 3
+Z_UP = 4
+Z_DOWN = 5
+
+def tilt(value, scale=127, one_g=ONE_G):
+    # Acceleration clamped to -1g..1g and scaled to -scale..scale
+    if value > one_g:
+        value = one_g
+    elif value < -one_g:
+        value = -one_g
+    return value * scale // one_g
+
+def orientation(v, one_g=ONE_G):
+    # Axis with most of gravity on it, None while moving or on a diagonal
+    best = None
+    most = one_g * 3 // 4
+    for axis in (X, Y, Z):
+        a = v[axis]
+        if abs(a) > most:
+            most = abs(a)
+            best = axis * 2 + (a < 0)
+    return best
+
 class STK8321:
     def __init__(self, i2c, address=0x0f):
-        import adafruit_bus_device.i2c_device as i2c_device
         try:
-            self.i2c = i2c_device.I2CDevice(i2c, address)
+            self.i2c = i2c_device(i2c, address)
         except ValueError as e:
             print(e)
             raise RuntimeError('Failed to find Accelerometer STK8321!')
@@ -10,6 +52,25 @@ class STK8321:
         if self.test() == False:
             raise RuntimeError('Failed to id STK8321!')
 
+        # X/Y/Z are 12 bit values left aligned in little endian halfwords,
+        # so reading into an array('h') and shifting sign-extends for free.
+        self.raw = array('h', [0, 0, 0])
+        self.vals = array('h', [0, 0, 0])
+        self.one_g = ONE_G
+
+        # FIFO frames are the same X/Y/Z halfwords back to back
+        self.fifo = False
+        self.burst = array('h', [0] * (FIFO_FRAMES * 3))
+        self.status = bytearray(1)
+        # Exponential moving average in 8.8 fixed point, each sample moves
+        # it 1/2**smoothing of the way
+        self.smoothing = 2
+        self.smooth = array('l', [0, 0, 0])
+        self.primed = False
+        self.samples = 0
+        # Optional listener(buf, n) given every batch of raw samples
+        self.listener = None
+
     def reset(self):
         with self.i2c:
             self.i2c.write(b'\x14')
@@ -20,8 +81,9 @@ class STK8321:
             self.i2c.write_then_readinto(b'\0', id)
         return 0x23 == id[0] # Documentation says 0x21 but chip returns 0x23
 
-    def get_raw_values(self):
-        a = bytearray(6)
+    def get_raw_values(self, a=None):
+        if a is None:
+            a = bytearray(6)
         with self.i2c:
             self.i2c.write_then_readinto(b'\x02', a)
         return a
@@ -38,13 +100,88 @@ class STK8321:
             self.i2c.write_then_readinto(b'\x09', a)
         return (a[0] & 0x4)==4
 
+    def readinto(self, out):
+        with self.i2c:
+            self.i2c.write_then_readinto(b'\x02', self.raw)
+        out[X] = self.raw[X] >> 4
+        out[Y] = self.raw[Y] >> 4
+        out[Z] = self.raw[Z] >> 4
+        return out
+
+    def set_range(self, g):
+        value, self.one_g = RANGES[g]
+        with self.i2c:
+            self.i2c.write(bytes([0x0f, value]))
+
+    def set_bandwidth(self, hz):
+        # Lowest filter bandwidth at or above hz, returns the one chosen
+        i = 0
+        while i < len(BANDWIDTHS) - 1 and BANDWIDTHS[i] < hz:
+            i += 1
+        with self.i2c:
+            self.i2c.write(bytes([0x10, 0x08 + i]))
+        return BANDWIDTHS[i]
+
+    def enable_fifo(self):
+        # Stream mode keeps the newest 32 samples. Not every part has the
+        # FIFO, so read the mode back and keep single reads if it didn't take.
+        with self.i2c:
+            self.i2c.write(bytes([0x3e, FIFO_STREAM]))
+            self.i2c.write_then_readinto(b'\x3e', self.status)
+        self.fifo = self.status[0] & 0xc0 == FIFO_STREAM
+        return self.fifo
+
+    def feed(self, x, y, z):
+        s = self.smooth
+        if not self.primed:
+            s[X] = x << 8
+            s[Y] = y << 8
+            s[Z] = z << 8
+            self.primed = True
+            return
+        k = self.smoothing
+        s[X] += ((x << 8) - s[X]) >> k
+        s[Y] += ((y << 8) - s[Y]) >> k
+        s[Z] += ((z << 8) - s[Z]) >> k
+
+    def drain(self):
+        # Everything in the FIFO in one burst, fed through the filter.
+        # Returns how many samples there were.
+        with self.i2c:
+            self.i2c.write_then_readinto(b'\x0c', self.status)
+            n = min(self.status[0] & 0x7f, FIFO_FRAMES)
+            if n:
+                self.i2c.write_then_readinto(b'\x3f', self.burst, in_end=n*3)
+        b = self.burst
+        for i in range(0, n*3, 3):
+            self.feed(b[i] >> 4, b[i+1] >> 4, b[i+2] >> 4)
+        self.samples += n
+        if n and self.listener:
+            self.listener(b, n)
+        return n
+
+    def readinto_smooth(self, out, drain=True):
+        # Filtered X/Y/Z, from the FIFO when there is one and drain is set.
+        # out is left as it was if no new sample has come in.
+        if self.fifo and drain:
+            n = self.drain()
+        else:
+            v = self.readinto(self.vals)
+            self.feed(v[X], v[Y], v[Z])
+            self.samples += 1
+            n = 1
+            if self.listener and not self.fifo:
+                self.listener(self.raw, 1)
+        if n:
+            s = self.smooth
+            out[X] = s[X] >> 8
+            out[Y] = s[Y] >> 8
+            out[Z] = s[Z] >> 8
+        return n
+
     def get_values(self):
-        raw = self.get_raw_values()
-        vals={}
-        vals['X'] = self.toint(raw[0:2])
-        vals['Y'] = self.toint(raw[2:4])
-        vals['Z'] = self.toint(raw[4:6])
-        return vals
+        v = self.readinto(self.vals)
+        return {'X':v[X],'Y':v[Y],'Z':v[Z]}
 
     def enableMotionInterrupt(self):
         with self.i2c:
@@ -0,0 +1,87 @@
+import math
+from array import array
+
+# One full turn is 256 table steps. Phases are 16 bit fixed point, the
+# high byte indexes the table and the low byte carries the fraction.
+TURN = 65536
+
+SINE = array('B', (int(127.5 + 127.5 * math.sin(2 * math.pi * i / 256)) for i in range(256)))
+
+# Maps a 0-255 brightness to the IS31FL3218 PWM register. The peak of 31
+# matches what the plain value // 8 scaling used to reach.
+GAMMA_PEAK = 31
+GAMMA = array('B', (int(GAMMA_PEAK * math.pow(i / 255, 2.2) + 0.5) for i in range(256)))
+
+def radians(r):
+    # Convert an angle to a phase step, only meant for setup code
+    return int(r * TURN / (2 * math.pi)) & 0xffff
+
+
+class Phase:
+    def __init__(self, step, phase=0):
+        self.step = step
+        self.phase = phase
+
+    def advance(self):
+        self.phase = (self.phase + self.step) & 0xffff
+        return self.phase >> 8
+
+
+class Wave:
+    # Sine wave travelling along the LEDs, spread is the phase offset
+    # between neighbouring LEDs in table steps.
+    def __init__(self, count, step, spread):
+        self.count = count
+        self.spread = spread
+        self.phase = Phase(step)
+
+    def step(self, out):
+        p = self.phase.phase >> 8
+        for i in range(self.count):
+            out[i] = SINE[(p + i * self.spread) & 0xff]
+        self.phase.advance()
+
+
+class Chase:
+    def __init__(self, count, on=100, off=5):
+        self.count = count
+        self.on = on
+        self.off = off
+        self.pos = 0
+
+    def step(self, out):
+        for i in range(self.count):
+            out[i] = self.on if i == self.pos else self.off
+        self.pos = (self.pos + 1) % self.count
+
+
+class Breathe:
+    def __init__(self, count, step):
+        self.count = count
+        self.phase = Phase(step, TURN * 3 // 4)
+
+    def step(self, out):
+        v = SINE[self.phase.phase >> 8]
+        for i in range(self.count):
+            out[i] = v
+        self.phase.advance()
+
+
+class Meter:
+    # Bar graph, value runs 0-255 across all LEDs with the last lit LED
+    # showing the remainder.
+    def __init__(self, count, level=255):
+        self.count = count
+        self.level = level
+        self.value = 0
+
+    def step(self, out):
+        scaled = self.value * self.count
+        full = scaled >> 8
+        for i in range(self.count):
+            if i < full:
+                out[i] = self.level
+            elif i == full:
+                out[i] = (scaled & 0xff) * self.level >> 8
+            else:
+                out[i] = 0
@@ -0,0 +1,144 @@
+# Bitmaps kept in RAM instead of streamed from flash. tools/convert_assets.py
+# turns BMPs into .bim files: a small header, an RGB palette and one
+# palette index per pixel, usually zlib compressed. Loaded bitmaps are
+# kept in a least recently used cache sized to the free heap; when an
+# image won't fit, OnDiskBitmap is used for it instead.
+import struct
+import displayio
+
+try:
+    import bitmaptools
+except ImportError:
+    bitmaptools = None
+
+try:
+    from gc import collect, mem_free
+except ImportError:
+    collect = None
+    mem_free = None
+
+MAGIC = b'BIM1'
+# magic, width, height, colours, transparent index (255 = none), compression
+HEADER = '<4sHHBBB'
+HEADER_SIZE = struct.calcsize(HEADER)
+RAW = 0
+ZLIB = 1
+NO_TRANSPARENT = 255
+
+def bitmap_size(width, height, colors):
+    # Bytes displayio.Bitmap uses: rows of 32 bit words, 1 to 8 bits a pixel
+    bits = 1
+    while (1 << bits) < colors:
+        bits *= 2
+    return (width * bits + 31) // 32 * 4 * height
+
+def read_header(f):
+    magic, width, height, colors, transparent, compression = struct.unpack(HEADER, f.read(HEADER_SIZE))
+    if magic != MAGIC:
+        raise ValueError("not a .bim file")
+    return width, height, colors, transparent, compression
+
+def decode(f):
+    width, height, colors, transparent, compression = read_header(f)
+    rgb = f.read(colors * 3)
+    palette = displayio.Palette(colors)
+    for i in range(colors):
+        palette[i] = rgb[i*3] << 16 | rgb[i*3+1] << 8 | rgb[i*3+2]
+    if transparent != NO_TRANSPARENT:
+        palette.make_transparent(transparent)
+    bitmap = displayio.Bitmap(width, height, colors)
+    if compression == RAW and bitmaptools:
+        bitmaptools.readinto(bitmap, f, 8)
+        return bitmap, palette
+    data = f.read()
+    if compression == ZLIB:
+        import zlib
+        data = zlib.decompress(data)
+    if bitmaptools:
+        bitmaptools.arrayblit(bitmap, data, 0, 0, width, height)
+    else:
+        i = 0
+        for y in range(height):
+            for x in range(width):
+                bitmap[x, y] = data[i]
+                i += 1
+    return bitmap, palette
+
+
+class Assets:
+    def __init__(self, root='/assets', budget=None, reserve=16384):
+        self.root = root
+        # Most bytes of bitmaps to keep, by default half the heap free now
+        if budget is None:
+            budget = mem_free() // 2 if mem_free else 1 << 20
+        self.budget = budget
+        # Heap to leave free after loading, decoding needs some scratch
+        self.reserve = reserve
+        self.cache = {}
+        self.order = []
+        self.used = 0
+        self.hits = 0
+        self.misses = 0
+        self.fallbacks = 0
+        # OnDiskBitmaps are small, keep the open files for reuse
+        self.on_disk = {}
+
+    def path(self, name):
+        return "%s/%s.bim" % (self.root, name)
+
+    def _touch(self, name):
+        self.order.remove(name)
+        self.order.append(name)
+
+    def evict(self, name=None):
+        if name is None:
+            name = self.order[0]
+        self.order.remove(name)
+        size = self.cache.pop(name)[2]
+        self.used -= size
+
+    def _fits(self, size):
+        if self.used + size > self.budget:
+            return False
+        return mem_free is None or mem_free() - size > self.reserve
+
+    def load(self, name, bmp=None):
+        # Returns (bitmap, pixel_shader). bmp is a BMP to fall back to
+        # with OnDiskBitmap when there's no .bim or no room for it.
+        entry = self.cache.get(name)
+        if entry:
+            self.hits += 1
+            self._touch(name)
+            return entry[0], entry[1]
+        self.misses += 1
+        try:
+            with open(self.path(name), 'rb') as f:
+                width, height, colors = read_header(f)[:3]
+                size = bitmap_size(width, height, colors)
+                while self.order and not self._fits(size):
+                    self.evict()
+                if not self._fits(size) and collect:
+                    collect()
+                if self._fits(size) or bmp is None:
+                    f.seek(0)
+                    bitmap, palette = decode(f)
+                    self.cache[name] = (bitmap, palette, size)
+                    self.order.append(name)
+                    self.used += size
+                    return bitmap, palette
+        except (OSError, MemoryError) as e:
+            if bmp is None:
+                raise
+            print(e)
+        return self.load_on_disk(bmp)
+
+    def load_on_disk(self, bmp):
+        bitmap = self.on_disk.get(bmp)
+        if bitmap is None:
+            bitmap = self.on_disk[bmp] = displayio.OnDiskBitmap(bmp)
+        self.fallbacks += 1
+        return bitmap, bitmap.pixel_shader
+
+    def tile_grid(self, name, bmp=None, **kwargs):
+        bitmap, shader = self.load(name, bmp)
+        return displayio.TileGrid(bitmap, pixel_shader=shader, **kwargs)
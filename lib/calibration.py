@@ -0,0 +1,15 @@
+# Joystick rest offsets, kept in the settings store (store.py)
+
+def load(store):
+    x = store.get('JCX')
+    y = store.get('JCY')
+    if x is not None and y is not None:
+        return x, y
+    return None
+
+def save(store, x, y):
+    # Written with the store's next flush, returns False if the store
+    # doesn't outlive a reset
+    store.set('JCX', x)
+    store.set('JCY', y)
+    return store.persistent
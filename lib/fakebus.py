@@ -0,0 +1,209 @@
+# Stand-in for busio.I2C so the drivers and the sensor hub can run under
+# desktop Python. Devices are modelled at register level and every bus
+# transaction is counted. Like busio, start/end count buffer items, so
+# array('h') buffers move two bytes per item.
+import struct
+
+class FakeI2C:
+    def __init__(self, frequency=100000):
+        self.frequency = frequency
+        self.devices = {}
+        self.locked = False
+        self.transactions = 0
+        self.bytes_written = 0
+        self.bytes_read = 0
+        # address -> [transactions, bytes]
+        self.traffic = {}
+        # Optional callback given the seconds each transfer holds the bus
+        self.busy = None
+        # Injected faults: the next failing transfers raise EIO, and while
+        # stuck every transfer does until the bus is recovered
+        self.failing = 0
+        self.stuck = False
+
+    def attach(self, device):
+        self.devices[device.address] = device
+        return device
+
+    def try_lock(self):
+        if self.locked:
+            return False
+        self.locked = True
+        return True
+
+    def unlock(self):
+        self.locked = False
+
+    def scan(self):
+        return sorted(self.devices)
+
+    def deinit(self):
+        pass
+
+    def _device(self, address):
+        if self.stuck:
+            raise OSError(5)
+        if self.failing:
+            self.failing -= 1
+            raise OSError(5)
+        if address not in self.devices:
+            raise OSError(19) # ENODEV, as busio reports a NACK
+        return self.devices[address]
+
+    def _count(self, address, nbytes, starts=1):
+        self.transactions += 1
+        t = self.traffic.get(address)
+        if t is None:
+            t = self.traffic[address] = [0, 0]
+        t[0] += 1
+        t[1] += nbytes
+        if self.busy:
+            # 9 clocks per byte including the address byte(s), plus start/stop
+            self.busy(((nbytes + starts) * 9 + 2 * starts) / self.frequency)
+
+    def writeto(self, address, buffer, *, start=0, end=None):
+        if end is None:
+            end = len(buffer)
+        device = self._device(address)
+        data = memoryview(buffer)[start:end].cast('B')
+        self._count(address, len(data))
+        self.bytes_written += len(data)
+        device.write(data)
+
+    def readfrom_into(self, address, buffer, *, start=0, end=None):
+        if end is None:
+            end = len(buffer)
+        device = self._device(address)
+        data = memoryview(buffer)[start:end].cast('B')
+        self._count(address, len(data))
+        self.bytes_read += len(data)
+        device.read_into(data)
+
+    def writeto_then_readfrom(self, address, out_buffer, in_buffer, *,
+            out_start=0, out_end=None, in_start=0, in_end=None):
+        if out_end is None:
+            out_end = len(out_buffer)
+        if in_end is None:
+            in_end = len(in_buffer)
+        device = self._device(address)
+        out_data = memoryview(out_buffer)[out_start:out_end].cast('B')
+        in_data = memoryview(in_buffer)[in_start:in_end].cast('B')
+        self._count(address, len(out_data) + len(in_data), 2)
+        self.bytes_written += len(out_data)
+        self.bytes_read += len(in_data)
+        device.write(out_data)
+        device.read_into(in_data)
+
+
+class RegisterDevice:
+    # First byte of a write selects the register, the rest is written with
+    # auto-increment. Reads continue from the selected register.
+    def __init__(self, address, size=256):
+        self.address = address
+        self.regs = bytearray(size)
+        self.pointer = 0
+
+    def write(self, data):
+        if not len(data):
+            return
+        self.pointer = data[0]
+        for b in data[1:]:
+            self.write_register(self.pointer, b)
+            self.pointer += 1
+
+    def write_register(self, reg, value):
+        self.regs[reg] = value
+
+    def read_into(self, buf):
+        for i in range(len(buf)):
+            buf[i] = self.regs[self.pointer]
+            self.pointer += 1
+
+
+class FakeJoystick:
+    def __init__(self, address=0x42):
+        self.address = address
+        self.x = 0
+        self.y = 0
+        self.button = 1
+
+    def set(self, x=0, y=0, pressed=False):
+        # Takes values in the scaled -512..512 range getPos() reports
+        self.x = x
+        self.y = y
+        self.button = 0 if pressed else 1
+
+    def write(self, data):
+        pass
+
+    def read_into(self, buf):
+        raw = struct.pack("<hhBB", self.x * 4, self.y * -4, self.button, 0)
+        for i in range(len(buf)):
+            buf[i] = raw[i]
+
+
+class FakeSTK8321(RegisterDevice):
+    # With a clock the FIFO fills at the output rate set in BWSEL, every
+    # frame holding the current reading. Without one it always has a frame.
+    def __init__(self, address=0x0f, clock=None):
+        super().__init__(address)
+        self.regs[0x00] = 0x23
+        self.regs[0x10] = 0x0f
+        self.clock = clock
+        self.filled = 0
+        self.frame = 0
+
+    def set(self, x=0, y=0, z=0):
+        for i, v in enumerate((x, y, z)):
+            v &= 0xfff
+            self.regs[0x02+i*2] = (v << 4) & 0xf0
+            self.regs[0x03+i*2] = v >> 4
+
+    def frames(self):
+        if self.clock is None:
+            return 1
+        rate = 15.625 * (1 << (self.regs[0x10] - 0x08))
+        n = int((self.clock() - self.filled) * rate)
+        return min(n, 32)
+
+    def write_register(self, reg, value):
+        self.regs[reg] = value
+        if reg == 0x3e and self.clock:
+            self.filled = self.clock()
+
+    def read_into(self, buf):
+        if self.pointer == 0x0c:
+            self.regs[0x0c] = self.frames()
+        if self.pointer != 0x3f:
+            return super().read_into(buf)
+        # FIFODATA doesn't auto-increment, each 6 bytes pops a frame
+        for i in range(len(buf)):
+            buf[i] = self.regs[0x02 + self.frame]
+            self.frame = (self.frame + 1) % 6
+        if self.clock:
+            self.filled = self.clock()
+
+
+class FakeIS31FL3218(RegisterDevice):
+    def __init__(self, address=0x54):
+        super().__init__(address, 0x18)
+        self.pwm = bytearray(18)
+        self.updates = 0
+
+    def write_register(self, reg, value):
+        if reg < len(self.regs):
+            self.regs[reg] = value
+        if reg == 0x16:
+            self.pwm[:] = self.regs[0x01:0x13]
+            self.updates += 1
+        elif reg == 0x17:
+            self.regs[:] = bytes(len(self.regs))
+            self.pwm[:] = bytes(18)
+
+
+def badge_bus(clock=None):
+    i2c = FakeI2C()
+    i2c.attach(FakeJoystick())
+    i2c.attach(FakeSTK8321(clock=clock))
+    i2c.attach(FakeIS31FL3218())
+    return i2c
@@ -0,0 +1,215 @@
+# Gestures from the accelerometer's sample batches. The STK8321 has no tap
+# engine, only the any-motion (slope) interrupt, so that gates the jerk
+# based detectors: shake and tap are only looked for while the interrupt
+# pin says something moved. Tilt and flip follow a smoothed copy of the
+# samples, tilt measured from where the badge was held when a tilt
+# handler subscribed, so one hanging on a lanyard doesn't count as
+# tilted. Everything is integer maths over sample counts, the windows
+# are set up from the output rate.
+#
+# Detected gestures are queued and handed to subscribers by dispatch(),
+# which runs as a background task, so apps get callbacks instead of
+# polling.
+from array import array
+from STK8321 import ONE_G, X, Y, Z, orientation, Z_UP, Z_DOWN
+
+SHAKE = 1
+TAP = 2
+DOUBLE_TAP = 3
+TILT_FORWARD = 4
+TILT_BACK = 5
+FLIP = 6
+NAMES = (None, 'shake', 'tap', 'double tap', 'tilt forward', 'tilt back', 'flip')
+
+class Gestures:
+    def __init__(self, rate=62.5, one_g=ONE_G, motion=None):
+        self.rate = rate
+        self.one_g = one_g
+        # Returns True while the slope interrupt is raised, None to skip the gate
+        self.motion = motion
+        self.handlers = {}
+        self.queue = bytearray(8)
+        self.head = 0
+        self.tail = 0
+        self.n = 0
+        self.px = 0
+        self.py = 0
+        self.pz = 0
+        self.primed = False
+        # Smoothed in 8.8 fixed point for tilt and flip
+        self.sx = 0
+        self.sy = 0
+        self.sz = one_g << 8
+
+        # Shake: shake_count jolts of more than shake_jerk inside a window
+        self.shake_jerk = one_g // 2
+        self.shake_count = 8
+        self.shake_window = self.samples(0.8)
+        self.shake_start = 0
+        self.shake_hits = 0
+        self.quiet_until = 0
+        # Tap: a jolt over tap_jerk that's over within tap_len samples,
+        # and a second one within double_window makes a double tap
+        self.tap_jerk = one_g * 2 // 5
+        self.tap_len = self.samples(0.05)
+        self.tap_quiet = self.samples(0.05)
+        self.double_window = self.samples(0.4)
+        self.spike_start = -1
+        self.spike_last = 0
+        self.pending_tap = -1
+        # Tilt: held past tilt_angle on Y from tilt_ref, once per tilt,
+        # it has to go back to neutral before the next. Held for longer
+        # than tilt_settle, the badge is taken to be sitting a new way and
+        # that becomes the reference. None takes it from the next sample.
+        self.tilt_angle = one_g * 35 // 100
+        self.tilt_hold = self.samples(0.3)
+        self.tilt_settle = self.samples(2)
+        self.tilt_ref = None
+        self.tilt_dir = 0
+        self.tilt_next = 0
+        self.tilt_sent = False
+        # Flip: Z turning from up to down or back
+        self.face = None
+        self.v = array('h', [0, 0, 0])
+
+    def samples(self, seconds):
+        return max(1, int(seconds * self.rate + 0.5))
+
+    def on(self, kind, fn):
+        # Subscribe fn(kind) to a gesture, returns the previous handler so
+        # an app can put it back when it exits
+        old = self.handlers.get(kind)
+        if fn is None:
+            self.handlers.pop(kind, None)
+        else:
+            self.handlers[kind] = fn
+            if kind == TILT_FORWARD or kind == TILT_BACK:
+                self.level()
+        return old
+
+    def level(self):
+        # Tilt counts from how the badge is held now
+        self.tilt_ref = self.sy >> 8 if self.primed else None
+        self.tilt_dir = 0
+
+    def emit(self, kind):
+        nxt = (self.head + 1) % len(self.queue)
+        if nxt != self.tail:
+            self.queue[self.head] = kind
+            self.head = nxt
+
+    def dispatch(self):
+        while self.tail != self.head:
+            kind = self.queue[self.tail]
+            self.tail = (self.tail + 1) % len(self.queue)
+            fn = self.handlers.get(kind)
+            if fn:
+                fn(kind)
+
+    def clear(self):
+        self.tail = self.head
+
+    def feed(self, buf, n, shift=4):
+        # n X/Y/Z frames from buf as the driver read them, left aligned
+        gate = True if self.motion is None else self.motion()
+        for i in range(0, n * 3, 3):
+            self.sample(buf[i] >> shift, buf[i+1] >> shift, buf[i+2] >> shift, gate)
+
+    def sample(self, x, y, z, gate=True):
+        self.n += 1
+        n = self.n
+        if not self.primed:
+            self.px = x
+            self.py = y
+            self.pz = z
+            self.sx = x << 8
+            self.sy = y << 8
+            self.sz = z << 8
+            self.primed = True
+        jerk = abs(x - self.px) + abs(y - self.py) + abs(z - self.pz)
+        self.px = x
+        self.py = y
+        self.pz = z
+        if gate and n >= self.quiet_until:
+            self.jolts(jerk, n)
+        if self.pending_tap >= 0 and n - self.pending_tap > self.double_window:
+            self.pending_tap = -1
+            self.emit(TAP)
+
+        self.sx += ((x << 8) - self.sx) >> 3
+        self.sy += ((y << 8) - self.sy) >> 3
+        self.sz += ((z << 8) - self.sz) >> 3
+        self.tilt(self.sy >> 8, n)
+        self.flip()
+
+    def jolts(self, jerk, n):
+        if jerk > self.shake_jerk:
+            if n - self.shake_start > self.shake_window:
+                self.shake_start = n
+                self.shake_hits = 0
+            self.shake_hits += 1
+            if self.shake_hits >= self.shake_count:
+                self.shake_hits = 0
+                self.spike_start = -1
+                self.pending_tap = -1
+                self.quiet_until = n + self.shake_window
+                self.emit(SHAKE)
+                return
+        if jerk > self.tap_jerk:
+            if self.spike_start < 0:
+                self.spike_start = n
+            self.spike_last = n
+        elif self.spike_start >= 0 and n - self.spike_last >= self.tap_quiet:
+            if self.spike_last - self.spike_start < self.tap_len:
+                if self.pending_tap >= 0:
+                    self.pending_tap = -1
+                    self.emit(DOUBLE_TAP)
+                else:
+                    self.pending_tap = self.spike_start
+            self.spike_start = -1
+
+    def tilt(self, y, n):
+        if self.tilt_ref is None:
+            self.tilt_ref = y
+        if self.tilt_dir and n >= self.tilt_next + self.tilt_settle:
+            self.tilt_ref = y
+            self.tilt_dir = 0
+        y -= self.tilt_ref
+        if y > self.tilt_angle:
+            d = 1
+        elif y < -self.tilt_angle:
+            d = -1
+        else:
+            self.tilt_dir = 0
+            return
+        if d != self.tilt_dir:
+            self.tilt_dir = d
+            self.tilt_next = n + self.tilt_hold
+            self.tilt_sent = False
+        elif not self.tilt_sent and n >= self.tilt_next:
+            self.tilt_sent = True
+            self.emit(TILT_FORWARD if d > 0 else TILT_BACK)
+
+    def flip(self):
+        v = self.v
+        v[X] = self.sx >> 8
+        v[Y] = self.sy >> 8
+        v[Z] = self.sz >> 8
+        face = orientation(v, self.one_g)
+        if face == Z_UP or face == Z_DOWN:
+            if self.face is not None and face != self.face:
+                self.emit(FLIP)
+            self.face = face
+
+
+class Recorder:
+    # A listener for the driver that prints batches as x,y,z lines, to
+    # record traces for tools/replay_gestures.py over the serial console
+    def __init__(self, out=print, shift=4):
+        self.out = out
+        self.shift = shift
+
+    def __call__(self, buf, n):
+        k = self.shift
+        for i in range(0, n * 3, 3):
+            self.out("%d,%d,%d" % (buf[i] >> k, buf[i+1] >> k, buf[i+2] >> k))
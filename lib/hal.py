@@ -0,0 +1,242 @@
+# Hardware abstraction for the badge. code.py and the drivers get their
+# buses, display, button pin and clock from here. On CircuitPython that's
+# the real hardware; anywhere else it's the simulator in simulator.py so
+# apps can be run and measured on a desktop.
+import sys
+import time
+
+DISPLAY_WIDTH = 160
+DISPLAY_HEIGHT = 80
+
+ON_BADGE = sys.implementation.name == 'circuitpython'
+
+def setting(name, default=None):
+    # settings.toml on CircuitPython, the environment elsewhere
+    try:
+        from os import getenv
+    except ImportError:
+        return default
+    value = getenv(name)
+    return default if value is None else value
+
+try:
+    from adafruit_bus_device.i2c_device import I2CDevice
+except ImportError:
+    # Just enough of adafruit_bus_device for the drivers on desktop Python
+    class I2CDevice:
+        def __init__(self, i2c, device_address, probe=True):
+            self.i2c = i2c
+            self.device_address = device_address
+            if probe:
+                with self:
+                    try:
+                        i2c.writeto(device_address, b'')
+                    except OSError:
+                        raise ValueError("No I2C device at address: 0x%x" % device_address)
+
+        def readinto(self, buf, *, start=0, end=None):
+            if end is None:
+                end = len(buf)
+            self.i2c.readfrom_into(self.device_address, buf, start=start, end=end)
+
+        def write(self, buf, *, start=0, end=None):
+            if end is None:
+                end = len(buf)
+            self.i2c.writeto(self.device_address, buf, start=start, end=end)
+
+        def write_then_readinto(self, out_buffer, in_buffer, *,
+                out_start=0, out_end=None, in_start=0, in_end=None):
+            if out_end is None:
+                out_end = len(out_buffer)
+            if in_end is None:
+                in_end = len(in_buffer)
+            self.i2c.writeto_then_readfrom(self.device_address, out_buffer, in_buffer,
+                out_start=out_start, out_end=out_end, in_start=in_start, in_end=in_end)
+
+        def __enter__(self):
+            while not self.i2c.try_lock():
+                time.sleep(0)
+            return self
+
+        def __exit__(self, exc_type, exc_val, exc_tb):
+            self.i2c.unlock()
+            return False
+
+
+def i2c_device(i2c, address, coalesce=False):
+    # Device at address for a driver. An i2cbus.Bus hands out its own
+    # managed devices, a plain busio.I2C gets an I2CDevice. coalesce says
+    # the device auto-increments, so register writes can be merged.
+    device = getattr(i2c, 'device', None)
+    if device is not None:
+        return device(address, coalesce=coalesce)
+    return I2CDevice(i2c, address)
+
+
+class Badge:
+    def __init__(self, i2c, display, button, monotonic=time.monotonic, sleep=time.sleep):
+        self.i2c = i2c
+        self.display = display
+        self.button = button
+        self.monotonic = monotonic
+        self.sleep = sleep
+        # BADGE_PROFILE = "serial" or "overlay" turns on the profiler
+        self.profile = setting('BADGE_PROFILE')
+
+    def ticks_ms(self):
+        return int(self.monotonic() * 1000)
+
+    def ticks_us(self):
+        return int(self.monotonic() * 1000000)
+
+    def reopen_i2c(self, frequency):
+        # The I2C bus at another clock, for i2cbus.Bus.negotiate()
+        return self.i2c
+
+    def recover_i2c(self):
+        # Free a bus a device is holding low and open it again
+        return self.i2c
+
+    def store_backend(self):
+        # Where store.Store keeps settings: the file named by BADGE_STORE,
+        # otherwise RAM that's gone when the program ends
+        from store import FileBackend, MemoryBackend
+        path = setting('BADGE_STORE')
+        if path:
+            return FileBackend(path)
+        return MemoryBackend(bytearray(b'\xff' * 4096))
+
+    def light_sleep(self, seconds):
+        # Sleep until the time is up or the button pin changes, returns
+        # True if it was the pin
+        self.sleep(seconds)
+        return False
+
+    def panel_sleep(self, sleeping):
+        pass
+
+
+def button_pin():
+    import board
+    from digitalio import DigitalInOut, Direction, Pull
+    btn = DigitalInOut(board.GP21)
+    btn.direction = Direction.INPUT
+    btn.pull = Pull.UP
+    return btn
+
+
+class HardwareBadge(Badge):
+    i2c_frequency = 100000
+
+    def __init__(self, i2c, display, button):
+        # Seconds from when the program started rather than from power on,
+        # worked out from the integer ns counter: CircuitPython floats only
+        # keep ms resolution for about 70 minutes from zero, and
+        # time.monotonic() counts from power on, through every reload
+        self.start_ns = time.monotonic_ns()
+        super().__init__(i2c, display, button, self.seconds)
+
+    def seconds(self):
+        return (time.monotonic_ns() - self.start_ns) / 1000000000
+
+    def ticks_ms(self):
+        # Integer ms from start, for deadlines that don't drift
+        return (time.monotonic_ns() - self.start_ns) // 1000000
+
+    def ticks_us(self):
+        # monotonic() is a float and loses microseconds within minutes
+        return time.monotonic_ns() // 1000
+
+    def reopen_i2c(self, frequency):
+        import board
+        import busio
+        self.i2c.deinit()
+        self.i2c = busio.I2C(board.GP17, board.GP16, frequency=frequency)
+        self.i2c_frequency = frequency
+        return self.i2c
+
+    def store_backend(self):
+        # All of microcontroller.nvm
+        from microcontroller import nvm
+        from store import MemoryBackend
+        return MemoryBackend(nvm, persistent=True)
+
+    def recover_i2c(self):
+        # A device reset or glitched mid read can sit on SDA waiting for
+        # clocks. Up to nine clocks by hand let it finish its byte, then a
+        # stop condition releases the bus.
+        import board
+        from digitalio import DigitalInOut, DriveMode
+        self.i2c.deinit()
+        scl = DigitalInOut(board.GP17)
+        sda = DigitalInOut(board.GP16)
+        scl.switch_to_output(value=True, drive_mode=DriveMode.OPEN_DRAIN)
+        sda.switch_to_input()
+        for i in range(9):
+            if sda.value:
+                break
+            scl.value = False
+            time.sleep(0.00001)
+            scl.value = True
+            time.sleep(0.00001)
+        sda.switch_to_output(value=False, drive_mode=DriveMode.OPEN_DRAIN)
+        time.sleep(0.00001)
+        sda.value = True
+        scl.deinit()
+        sda.deinit()
+        return self.reopen_i2c(self.i2c_frequency)
+
+    def light_sleep(self, seconds):
+        # PinAlarm needs the pin to itself, so give it up while asleep
+        import alarm
+        import board
+        level = self.button.value
+        self.button.deinit()
+        pin = alarm.pin.PinAlarm(board.GP21, value=not level, pull=True)
+        # TimeAlarm goes by time.monotonic(), not the badge's clock
+        timer = alarm.time.TimeAlarm(monotonic_time=time.monotonic() + seconds)
+        woke = alarm.light_sleep_until_alarms(pin, timer)
+        self.button = button_pin()
+        return isinstance(woke, alarm.pin.PinAlarm)
+
+    def panel_sleep(self, sleeping):
+        # ST7735 SLPIN/SLPOUT, the panel needs 120ms after waking
+        self.display.bus.send(0x10 if sleeping else 0x11, b'')
+        if not sleeping:
+            self.sleep(0.12)
+
+
+def hardware():
+    import board
+    import busio
+    import displayio
+    from adafruit_st7735r import ST7735R
+
+    btn = button_pin()
+
+    displayio.release_displays()
+    spi = busio.SPI(board.GP2, board.GP3, board.GP4)
+    displayio.release_displays()
+    display_bus = displayio.FourWire(spi, command=board.GP5, chip_select=board.GP7, reset=board.GP6)
+    display = ST7735R(display_bus, width=DISPLAY_WIDTH, height=DISPLAY_HEIGHT, colstart=24, rotation=270, backlight_pin=board.GP8)
+
+    i2c = busio.I2C(board.GP17, board.GP16)
+    return HardwareBadge(i2c, display, btn)
+
+
+def simulator():
+    from simulator import Simulator
+    return Simulator()
+
+
+badge = None
+
+def init(backend=None):
+    # backend is 'hardware' or 'simulator', the default depends on where
+    # we're running. Later calls return the badge made by the first one.
+    global badge
+    if badge is None:
+        if backend is None:
+            backend = 'hardware' if ON_BADGE else 'simulator'
+        badge = hardware() if backend == 'hardware' else simulator()
+    return badge
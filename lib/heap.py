@@ -0,0 +1,72 @@
+# When the heap gets collected. Left alone, CircuitPython collects when an
+# allocation fails, which can land in the middle of a frame and take a few
+# ms out of it. check() runs as a late task, straight after the display
+# refresh, and collects once budget bytes have been allocated since the
+# last collection. spare() gets the scheduler's slack before it sleeps and
+# collects a little earlier when there's time for it. Collection stays
+# enabled in between (no gc.disable()): an allocation that doesn't fit
+# still gets its collection rather than a MemoryError.
+#
+# start_app() and end_app() bracket a run of an app and note the highest
+# heap use seen while it ran and what it left behind once it exited.
+import gc
+from timeline import mem_used
+
+class Heap:
+    def __init__(self, ticks_us, budget=16384):
+        # Microsecond counter for timing collections
+        self.ticks_us = ticks_us
+        self.budget = budget
+        # In use after the last collection
+        self.base = mem_used()
+        self.high = self.base
+        # Longest a collection took and the last one, in us
+        self.worst = 0
+        self.cost = 0
+        self.collects = 0
+        self.app = None
+        self.before = 0
+
+    def collect(self):
+        start = self.ticks_us()
+        gc.collect()
+        self.cost = self.ticks_us() - start
+        if self.cost > self.worst:
+            self.worst = self.cost
+        self.collects += 1
+        self.base = mem_used()
+
+    def sample(self):
+        used = mem_used()
+        if used > self.high:
+            self.high = used
+        return used
+
+    def check(self):
+        # At the frame boundary
+        if self.sample() - self.base >= self.budget:
+            self.collect()
+
+    def spare(self, seconds):
+        # Idle before the next deadline, collect at half the budget if the
+        # last collection would have fit
+        if seconds * 1000000 > self.cost and self.sample() - self.base >= self.budget // 2:
+            self.collect()
+
+    def start_app(self, name):
+        self.collect()
+        self.app = name
+        self.before = self.base
+        self.high = self.base
+        self.collects = 0
+        self.worst = 0
+
+    def end_app(self, out=print):
+        # Call once the app's modules are gone. What's still in use beyond
+        # the heap before launch is leaked or held in a cache. out=None
+        # only collects.
+        self.collect()
+        if self.app is not None and out:
+            out("%s: heap peak +%d B, +%d B after exit, %d collects, worst %d us" % (self.app,
+                self.high - self.before, self.base - self.before, self.collects - 1, self.worst))
+        self.app = None
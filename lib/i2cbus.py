@@ -0,0 +1,205 @@
+# Owns the shared I2C bus. The drivers get their devices from here instead
+# of wrapping busio.I2C in I2CDevices of their own (see hal.i2c_device).
+#
+# negotiate() reopens the bus at the fastest clock every device still
+# answers at. A transfer that fails with OSError (a NACK, a glitch on
+# the lines) is tried again, and before the last try the bus is recovered
+# by clocking out whatever device is holding SDA low. Only when every
+# try fails does the error reach the driver. Writes to devices that
+# auto-increment are queued for the length of a `with device:` block and
+# ones to consecutive registers go out as one burst. Every transfer's
+# time goes into a per device histogram, and to the profiler if one is set.
+from array import array
+
+READ = 0
+WRITE = 1
+WRITE_READ = 2
+
+# Histogram bucket upper bounds in microseconds, the last bucket is the rest
+BUCKETS = (100, 200, 500, 1000, 2000, 5000)
+
+
+def nbytes(buf, start, end):
+    # Bytes in buf[start:end], drivers read into array('h') as well as bytes
+    return (end - start) * memoryview(buf).itemsize
+
+
+class Device:
+    # Stands in for adafruit_bus_device's I2CDevice
+    def __init__(self, bus, address, coalesce=False, size=32):
+        self.bus = bus
+        self.device_address = address
+        # Queued register writes: one run starting at pending[0]'s register
+        self.coalesce = coalesce
+        self.pending = bytearray(size)
+        self.queued = 0
+        self.transfers = 0
+        self.errors = 0
+        self.histogram = array('L', [0] * (len(BUCKETS) + 1))
+        self.worst = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.flush()
+        else:
+            self.queued = 0
+        return False
+
+    def record(self, us):
+        self.transfers += 1
+        i = 0
+        while i < len(BUCKETS) and us >= BUCKETS[i]:
+            i += 1
+        self.histogram[i] += 1
+        if us > self.worst:
+            self.worst = us
+
+    def flush(self):
+        n = self.queued
+        if n:
+            self.queued = 0
+            self.bus.transfer(self, WRITE, self.pending, None, 0, n, 0, 0)
+
+    def readinto(self, buf, *, start=0, end=None):
+        self.flush()
+        if end is None:
+            end = len(buf)
+        self.bus.transfer(self, READ, buf, None, start, end, 0, 0)
+
+    def write(self, buf, *, start=0, end=None):
+        if end is None:
+            end = len(buf)
+        n = end - start
+        if not self.coalesce or n < 1:
+            self.flush()
+            self.bus.transfer(self, WRITE, buf, None, start, end, 0, 0)
+            return
+        pending = self.pending
+        q = self.queued
+        # Carries on from the register after the queued run: append the data
+        if q and buf[start] == pending[0] + q - 1 and q + n - 1 <= len(pending):
+            pending[q:q + n - 1] = buf[start + 1:end]
+            self.queued = q + n - 1
+            return
+        self.flush()
+        if n > len(pending):
+            self.bus.transfer(self, WRITE, buf, None, start, end, 0, 0)
+            return
+        pending[0:n] = buf[start:end]
+        self.queued = n
+
+    def write_then_readinto(self, out_buffer, in_buffer, *,
+            out_start=0, out_end=None, in_start=0, in_end=None):
+        self.flush()
+        if out_end is None:
+            out_end = len(out_buffer)
+        if in_end is None:
+            in_end = len(in_buffer)
+        self.bus.transfer(self, WRITE_READ, out_buffer, in_buffer, out_start, out_end, in_start, in_end)
+
+
+class Bus:
+    def __init__(self, i2c, ticks_us, retries=2, reopen=None, recover=None):
+        self.i2c = i2c
+        # Microsecond counter for the histograms
+        self.ticks_us = ticks_us
+        self.retries = retries
+        # reopen(frequency) and recover() give back a new busio.I2C, or
+        # are None where the bus can't be changed
+        self.reopen = reopen
+        self.recover = recover
+        self.frequency = None
+        self.devices = {}
+        self.errors = 0
+        self.recoveries = 0
+        self.failures = 0
+        # Optional profiler.Profiler, told about every transfer that went out
+        self.profiler = None
+
+    def negotiate(self, addresses, speeds=(400000, 100000)):
+        # Fastest clock in speeds that every address acknowledges at, the
+        # slowest if none does. Returns the clock, None if it's fixed.
+        if self.reopen is None:
+            return None
+        for frequency in speeds:
+            self.i2c = self.reopen(frequency)
+            self.frequency = frequency
+            found = self.scan()
+            missing = False
+            for address in addresses:
+                if address not in found:
+                    missing = True
+            if not missing:
+                break
+        return self.frequency
+
+    def scan(self):
+        i2c = self.i2c
+        while not i2c.try_lock():
+            pass
+        try:
+            return i2c.scan()
+        finally:
+            i2c.unlock()
+
+    def device(self, address, probe=True, coalesce=False):
+        if probe and address not in self.scan():
+            # As I2CDevice does, the drivers turn it into a RuntimeError
+            raise ValueError("No I2C device at address: 0x%x" % address)
+        device = Device(self, address, coalesce)
+        self.devices[address] = device
+        return device
+
+    def transfer(self, device, kind, a, b, a_start, a_end, b_start, b_end):
+        address = device.device_address
+        tries = 0
+        while True:
+            i2c = self.i2c
+            while not i2c.try_lock():
+                pass
+            start = self.ticks_us()
+            try:
+                if kind == READ:
+                    i2c.readfrom_into(address, a, start=a_start, end=a_end)
+                elif kind == WRITE:
+                    i2c.writeto(address, a, start=a_start, end=a_end)
+                else:
+                    i2c.writeto_then_readfrom(address, a, b, out_start=a_start, out_end=a_end,
+                        in_start=b_start, in_end=b_end)
+                error = None
+            except OSError as e:
+                error = e
+            finally:
+                i2c.unlock()
+            if error is None:
+                device.record(self.ticks_us() - start)
+                if self.profiler:
+                    n = nbytes(a, a_start, a_end)
+                    if kind == WRITE_READ:
+                        n += nbytes(b, b_start, b_end)
+                    self.profiler.tally(n)
+                return
+            device.errors += 1
+            self.errors += 1
+            tries += 1
+            if tries > self.retries:
+                self.failures += 1
+                raise error
+            if tries == self.retries and self.recover:
+                # Last go, free the bus first in case a device is stuck mid byte
+                self.i2c = self.recover()
+                self.recoveries += 1
+
+    def report(self, out=print, names=None):
+        out("i2c at %s, %d errors, %d recoveries, %d failed" % (
+            "%d kHz" % (self.frequency // 1000) if self.frequency else "default clock",
+            self.errors, self.recoveries, self.failures))
+        out("device,transfers,errors,worst_us," + ",".join("<%d" % b for b in BUCKETS) + ",more")
+        for address in sorted(self.devices):
+            d = self.devices[address]
+            name = names.get(address, hex(address)) if names else hex(address)
+            out("%s,%d,%d,%d,%s" % (name, d.transfers, d.errors, d.worst,
+                ",".join(str(n) for n in d.histogram)))
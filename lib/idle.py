@@ -0,0 +1,131 @@
+# Saves battery when the badge is left alone. check() runs as a background
+# task; after dim_after seconds without the joystick moving or the badge
+# being moved it dims the backlight and LEDs and slows polling down. After
+# sleep_after seconds it blanks both and light sleeps, waking on the
+# accelerometer's motion pin or every wake_period to look at the joystick,
+# which has no interrupt line. The app that was running carries on where
+# it was once the badge wakes.
+from array import array
+from sensorhub import X, Y, Z
+
+ACTIVE = 0
+DIM = 1
+ASLEEP = 2
+
+class Idle:
+    def __init__(self, badge, hub, leds=None, dim_after=30, sleep_after=120, wake_period=0.5):
+        self.badge = badge
+        self.hub = hub
+        self.leds = leds
+        self.dim_after = dim_after
+        self.sleep_after = sleep_after
+        self.wake_period = wake_period
+        # Backlight fraction and LED brightness (of 255) while dimmed
+        self.dim_backlight = 0.1
+        self.dim_leds = 96
+        # Polling rates while dimmed
+        self.dim_joy_rate = 10
+        self.dim_accel_rate = 5
+        # Stick deflection and change in acceleration that count as use
+        self.dead_zone = 60
+        self.motion = 48
+        self.last_accel = array('h', [0, 0, 0])
+        self.state = ACTIVE
+        self.last = badge.monotonic()
+        self.brightness = badge.display.brightness
+        self.rates = None
+        # Set these to have deadlines restarted and the app told after a wake
+        self.scheduler = None
+        self.on_wake = None
+        # Called on dimming, before the badge can go to sleep
+        self.on_dim = None
+        self.sleeps = 0
+        self.slept = 0
+
+    def active(self):
+        hub = self.hub
+        used = False
+        if hub.joystick:
+            j = hub.joy
+            if abs(j[X]) > self.dead_zone or abs(j[Y]) > self.dead_zone or hub.pressed():
+                used = True
+        if hub.accelerometer:
+            a = hub.accel
+            l = self.last_accel
+            if abs(a[X] - l[X]) + abs(a[Y] - l[Y]) + abs(a[Z] - l[Z]) > self.motion:
+                used = True
+            l[X] = a[X]
+            l[Y] = a[Y]
+            l[Z] = a[Z]
+        return used
+
+    def check(self):
+        now = self.badge.monotonic()
+        if self.active():
+            self.last = now
+            if self.state != ACTIVE:
+                self.wake()
+        elif self.state == ACTIVE and now - self.last >= self.dim_after:
+            self.dim()
+        elif self.state == DIM and now - self.last >= self.sleep_after:
+            self.sleep()
+
+    def dim(self):
+        self.state = DIM
+        self.brightness = self.badge.display.brightness
+        self.badge.display.brightness = self.brightness * self.dim_backlight
+        if self.leds:
+            self.leds.set_brightness(self.dim_leds)
+            self.leds.show()
+        hub = self.hub
+        self.rates = (1 / hub.joy_period, 1 / hub.accel_period)
+        hub.set_rates(self.dim_joy_rate, self.dim_accel_rate)
+        if self.on_dim:
+            self.on_dim()
+
+    def sleep(self):
+        self.state = ASLEEP
+        badge = self.badge
+        hub = self.hub
+        badge.display.brightness = 0
+        badge.panel_sleep(True)
+        if self.leds:
+            self.leds.setEnabled(False)
+        self.sleeps += 1
+        start = badge.monotonic()
+        while True:
+            moved = badge.light_sleep(self.wake_period)
+            # As in SensorHub.poll: a failed read keeps the last sample and
+            # the badge sleeps on until the next wake
+            if hub.joystick:
+                try:
+                    hub.read_joystick()
+                except OSError:
+                    hub.errors += 1
+            if hub.accelerometer:
+                try:
+                    hub.read_accel()
+                except OSError:
+                    hub.errors += 1
+            if self.active() or moved:
+                break
+        self.slept += badge.monotonic() - start
+        self.last = badge.monotonic()
+        self.wake()
+
+    def wake(self):
+        if self.state == ASLEEP:
+            self.badge.panel_sleep(False)
+            if self.leds:
+                self.leds.setEnabled(True)
+        self.state = ACTIVE
+        self.badge.display.brightness = self.brightness
+        if self.leds:
+            self.leds.set_brightness(255)
+            self.leds.show()
+        if self.rates:
+            self.hub.set_rates(*self.rates)
+        if self.scheduler:
+            self.scheduler.resync()
+        if self.on_wake:
+            self.on_wake()
@@ -0,0 +1,180 @@
+# Buttons sampled at a fixed rate by a background task, debounced and
+# turned into timestamped events, one bounded queue per button. Apps read
+# the events instead of catching the button down at the moment they
+# happen to look, so short presses aren't lost and the time from press to
+# handling can be measured.
+PRESS = 1
+RELEASE = 2
+LONG = 3
+DOUBLE = 4
+
+class Event:
+    # Filled in by Input.get_into() so reading events doesn't allocate
+    def __init__(self):
+        self.kind = 0
+        self.source = 0
+        self.time = 0
+
+
+class Source:
+    def __init__(self, read, stamp, debounce, size):
+        # read() is True while pressed, stamp() is when that was sampled
+        self.read = read
+        self.stamp = stamp
+        self.debounce = debounce
+        self.raw = False
+        self.changed = 0
+        self.held = False
+        self.pressed_at = 0
+        self.long_sent = False
+        self.last_short = None
+        self.kinds = bytearray(size)
+        self.times = [0.0] * size
+        self.head = 0
+        self.tail = 0
+        self.dropped = 0
+
+
+class Input:
+    def __init__(self, clock, rate=100, long_press=0.3, double_press=0.3, size=8):
+        self.clock = clock
+        self.period = 1 / rate
+        self.long_press = long_press
+        self.double_press = double_press
+        self.size = size
+        self.sources = []
+        # Seconds from a press being sampled to an app reading its event
+        self.latency_total = 0
+        self.latency_max = 0
+        self.handled = 0
+
+    def add(self, read, stamp=None, debounce=0.02):
+        self.sources.append(Source(read, stamp, debounce, self.size))
+        return len(self.sources) - 1
+
+    def held(self, source):
+        return self.sources[source].held
+
+    def post(self, s, kind, t):
+        nxt = (s.head + 1) % self.size
+        if nxt == s.tail:
+            s.dropped += 1
+            return
+        s.kinds[s.head] = kind
+        s.times[s.head] = t
+        s.head = nxt
+
+    def poll(self):
+        now = self.clock()
+        for i in range(len(self.sources)):
+            s = self.sources[i]
+            raw = bool(s.read())
+            t = now
+            if s.stamp:
+                t = s.stamp()
+                if t is None:
+                    t = now
+            if raw != s.raw:
+                s.raw = raw
+                s.changed = t
+            if raw != s.held and t - s.changed >= s.debounce:
+                # Stable for long enough, the edge counts from when it started
+                s.held = raw
+                if raw:
+                    s.pressed_at = s.changed
+                    s.long_sent = False
+                    self.post(s, PRESS, s.changed)
+                    if s.last_short is not None and s.changed - s.last_short <= self.double_press:
+                        s.last_short = None
+                        self.post(s, DOUBLE, s.changed)
+                else:
+                    self.post(s, RELEASE, s.changed)
+                    if not s.long_sent:
+                        s.last_short = s.changed
+            elif s.held and not s.long_sent and now - s.pressed_at >= self.long_press:
+                s.long_sent = True
+                s.last_short = None
+                self.post(s, LONG, s.pressed_at + self.long_press)
+
+    def get_into(self, event, source):
+        # Oldest event for a source into event, False when there are none
+        s = self.sources[source]
+        if s.tail == s.head:
+            return False
+        event.kind = s.kinds[s.tail]
+        event.source = source
+        event.time = s.times[s.tail]
+        s.tail = (s.tail + 1) % self.size
+        if event.kind == PRESS:
+            latency = self.clock() - event.time
+            self.latency_total += latency
+            self.handled += 1
+            if latency > self.latency_max:
+                self.latency_max = latency
+        return True
+
+    def clear(self, source):
+        s = self.sources[source]
+        s.tail = s.head
+
+
+class Button:
+    # pressed() and multi_pressed() on top of a source's events, as apps
+    # used them when they polled the button themselves. wait_for() blocks
+    # with nothing scheduled, so it sleeps and polls the sensors itself.
+    PRESSED_SHORT = 1
+    PRESSED_LONG = 2
+
+    def __init__(self, inputs, source, sleep=None, poll=None):
+        self.inputs = inputs
+        self.source = source
+        self.sleep = sleep
+        self.poll = poll
+        self.event = Event()
+        # The press in progress was already used, its release doesn't count
+        self.ignore = False
+        # When the last press was sampled
+        self.press_time = None
+
+    def pressed(self):
+        # Polling first picks up a joystick sample taken since the last
+        # scheduled poll, extra polls don't upset the debounce
+        self.inputs.poll()
+        e = self.event
+        while self.inputs.get_into(e, self.source):
+            if e.kind == PRESS:
+                self.press_time = e.time
+                self.ignore = True
+                return True
+            if e.kind == RELEASE:
+                self.ignore = False
+        return False
+
+    def wait_for(self):
+        while not self.pressed():
+            self.sleep(self.inputs.period)
+            if self.poll:
+                self.poll()
+
+    def multi_pressed(self):
+        self.inputs.poll()
+        e = self.event
+        while self.inputs.get_into(e, self.source):
+            if e.kind == PRESS:
+                self.press_time = e.time
+                self.ignore = False
+            elif e.kind == LONG:
+                if not self.ignore:
+                    self.ignore = True
+                    return Button.PRESSED_LONG
+            elif e.kind == RELEASE:
+                used = self.ignore
+                self.ignore = False
+                if not used:
+                    return Button.PRESSED_SHORT
+        return False
+
+    def flush(self):
+        # Drop queued events, and the rest of a press still held down
+        self.inputs.clear(self.source)
+        self.ignore = self.inputs.held(self.source)
@@ -1,24 +1,41 @@
-import struct
-import math
+from array import array
+from hal import i2c_device
+
+# Indexes into the buffers filled by readinto()
+X = 0
+Y = 1
+BUTTON = 2
+
 class Joystick:
     def __init__(self, i2c, address=0x42):
-        import adafruit_bus_device.i2c_device as i2c_device
         try:
-            self.i2c = i2c_device.I2CDevice(i2c, address)
+            self.i2c = i2c_device(i2c, address)
         except ValueError as e:
             print(e)
             raise RuntimeError('Failed to find Joystick!')
+        # The report is <hhBB, read straight into three little endian
+        # halfwords so decoding needs no tuple or slice.
+        self.raw = array('h', [0, 0, 0])
+        self.pos = array('h', [0, 0, 0])
 
-    def getPos(self):
-        a = bytearray(6)
+    def readinto_raw(self, out):
         with self.i2c:
-            self.i2c.readinto(a)
-        x,y,b,m = struct.unpack("<hhBB", a)
-        return {'X':x//4,'Y':y//-4,'Button':b}
+            self.i2c.readinto(self.raw)
+        out[X] = self.raw[X]
+        out[Y] = self.raw[Y]
+        out[BUTTON] = self.raw[BUTTON] & 0xff
+        return out
+
+    def readinto(self, out):
+        self.readinto_raw(out)
+        out[X] //= 4
+        out[Y] //= -4
+        return out
+
+    def getPos(self):
+        p = self.readinto(self.pos)
+        return {'X':p[X],'Y':p[Y],'Button':p[BUTTON]}
 
     def getRawData(self):
-        a = bytearray(6)
-        with self.i2c:
-            self.i2c.readinto(a)
-        x,y,b,m = struct.unpack("<hhBB", a)
-        return {'X':x,'Y':y,'Button':b}
\ No newline at end of file
+        p = self.readinto_raw(self.pos)
+        return {'X':p[X],'Y':p[Y],'Button':p[BUTTON]}
@@ -0,0 +1,252 @@
+import displayio
+import random
+from array import array
+
+# Cell states
+HIDDEN = 0
+REVEALED = 1
+FLAGGED = 2
+EXPOSED = 3  # mine shown at the end of a game
+
+# Tiles 0-8 are revealed cells showing their neighbour count
+TILE_HIDDEN = 9
+TILE_FLAGGED = 10
+TILE_MINE = 11
+TILES = 12
+
+class Board:
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.area = width * height
+        self.mine = bytearray(self.area)
+        self.count = bytearray(self.area)
+        self.state = bytearray(self.area)
+        self.mines = 0
+        self.flags = 0
+        self.hidden = self.area
+        # Flood fill scratch, sized once so reveals never allocate
+        self.stack = array('H', bytes(2 * self.area))
+        self.visited = bytearray((self.area + 7) // 8)
+        # Cells whose tile changed since the renderer last looked
+        self.dirty = array('H', bytes(2 * self.area))
+        self.dirty_map = bytearray((self.area + 7) // 8)
+        self.ndirty = 0
+
+    def clear(self):
+        # Empty board for a new game, cells that weren't hidden are redrawn
+        for i in range(self.area):
+            self.mine[i] = 0
+            self.count[i] = 0
+            if self.state[i] != HIDDEN:
+                self.state[i] = HIDDEN
+                self._touch(i)
+        self.mines = 0
+        self.flags = 0
+        self.hidden = self.area
+
+    def neighbours(self, i):
+        # Yields indexes of the up to 8 cells around i
+        x = i % self.width
+        y = i // self.width
+        for ny in range(max(y - 1, 0), min(y + 2, self.height)):
+            for nx in range(max(x - 1, 0), min(x + 2, self.width)):
+                n = ny * self.width + nx
+                if n != i:
+                    yield n
+
+    def add_mine(self, i):
+        self.mine[i] = 1
+        self.mines += 1
+        for n in self.neighbours(i):
+            self.count[n] += 1
+
+    def remove_mine(self, i):
+        self.mine[i] = 0
+        self.mines -= 1
+        for n in self.neighbours(i):
+            self.count[n] -= 1
+
+    def place(self, count):
+        # Floyd's sampling: a partial Fisher-Yates that touches only
+        # `count` cells and uses the mine bytearray as its seen-set, so
+        # placement is O(count) with no index list to allocate.
+        for j in range(self.area - count, self.area):
+            t = random.randrange(j + 1)
+            if self.mine[t]:
+                t = j
+            self.add_mine(t)
+
+    def move_mine(self, i):
+        # Shift the mine at i to the next free cell after it, only the
+        # neighbour counts around the two cells change.
+        j = i
+        while True:
+            j = (j + 1) % self.area
+            if j == i:
+                return
+            if not self.mine[j]:
+                break
+        self.remove_mine(i)
+        self.add_mine(j)
+
+    def _touch(self, i):
+        bit = 1 << (i & 7)
+        if not self.dirty_map[i >> 3] & bit:
+            self.dirty_map[i >> 3] |= bit
+            self.dirty[self.ndirty] = i
+            self.ndirty += 1
+
+    def take_dirty(self):
+        # Returns how many entries of self.dirty are valid and resets them
+        n = self.ndirty
+        for k in range(n):
+            i = self.dirty[k]
+            self.dirty_map[i >> 3] &= ~(1 << (i & 7))
+        self.ndirty = 0
+        return n
+
+    def tile(self, i):
+        s = self.state[i]
+        if s == REVEALED:
+            return self.count[i]
+        if s == FLAGGED:
+            return TILE_FLAGGED
+        if s == EXPOSED:
+            return TILE_MINE
+        return TILE_HIDDEN
+
+    def flag(self, i):
+        # Returns the change in the number of placed flags
+        s = self.state[i]
+        if s == HIDDEN:
+            self.state[i] = FLAGGED
+            self.flags += 1
+            self._touch(i)
+            return 1
+        if s == FLAGGED:
+            self.state[i] = HIDDEN
+            self.flags -= 1
+            self._touch(i)
+            return -1
+        return 0
+
+    def reveal(self, i):
+        # Returns -1 on a mine, otherwise the number of cells uncovered.
+        # Every cell is pushed at most once thanks to the visited bitmap.
+        if self.state[i] == REVEALED:
+            return 0
+        if self.mine[i] and self.hidden == self.area:
+            # The first click is always safe
+            self.move_mine(i)
+        if self.mine[i]:
+            self.state[i] = EXPOSED
+            self._touch(i)
+            return -1
+        visited = self.visited
+        for k in range(len(visited)):
+            visited[k] = 0
+        stack = self.stack
+        w = self.width
+        stack[0] = i
+        visited[i >> 3] |= 1 << (i & 7)
+        top = 1
+        revealed = 0
+        while top:
+            top -= 1
+            c = stack[top]
+            if self.state[c] == FLAGGED:
+                self.flags -= 1
+            self.state[c] = REVEALED
+            self._touch(c)
+            revealed += 1
+            if self.count[c]:
+                continue
+            x = c % w
+            y = c // w
+            for ny in range(max(y - 1, 0), min(y + 2, self.height)):
+                for n in range(ny * w + max(x - 1, 0), ny * w + min(x + 2, w)):
+                    bit = 1 << (n & 7)
+                    if visited[n >> 3] & bit or self.state[n] == REVEALED:
+                        continue
+                    visited[n >> 3] |= bit
+                    stack[top] = n
+                    top += 1
+        self.hidden -= revealed
+        return revealed
+
+    def expose(self):
+        # End of game: show every mine and uncover the rest
+        for i in range(self.area):
+            if self.mine[i]:
+                if self.state[i] != EXPOSED:
+                    self.state[i] = EXPOSED
+                    self._touch(i)
+            elif self.state[i] != REVEALED:
+                self.state[i] = REVEALED
+                self._touch(i)
+
+    def won(self):
+        return self.hidden == self.mines
+
+
+# 3x5 digits, one byte per row with the pixels in the low 3 bits
+DIGITS = (
+    b'\x07\x05\x05\x05\x07', b'\x02\x06\x02\x02\x07', b'\x07\x01\x07\x04\x07',
+    b'\x07\x01\x03\x01\x07', b'\x05\x05\x07\x01\x01', b'\x07\x04\x07\x01\x07',
+    b'\x07\x04\x07\x05\x07', b'\x07\x01\x01\x02\x02', b'\x07\x05\x07\x05\x07',
+)
+
+# Palette slots
+_GAP = 0
+_HIDDEN = 1
+_FLAGGED = 2
+_OPEN = 3
+_DIGIT = 4
+_MINE = 5
+
+class Renderer:
+    # Draws the whole board as one TileGrid over a generated tile sheet;
+    # update() only touches the cells the board marked dirty.
+    def __init__(self, board, size):
+        self.board = board
+        self.size = size
+        palette = displayio.Palette(6)
+        palette[_GAP] = 0x000000
+        palette[_HIDDEN] = 0x808080
+        palette[_FLAGGED] = 0xFF8080
+        palette[_OPEN] = 0x202020
+        palette[_DIGIT] = 0x00FF00
+        palette[_MINE] = 0xFF0000
+        self.palette = palette
+        self.sheet = self._tiles(size)
+        self.grid = displayio.TileGrid(self.sheet, pixel_shader=palette,
+            width=board.width, height=board.height,
+            tile_width=size, tile_height=size, default_tile=TILE_HIDDEN)
+
+    def _tiles(self, size):
+        sheet = displayio.Bitmap(size * TILES, size, 6)
+        fills = [_OPEN] * 9 + [_HIDDEN, _FLAGGED, _MINE]
+        scale = 2 if size >= 14 else 1
+        for t in range(TILES):
+            ox = t * size
+            for y in range(size - 1):
+                for x in range(size - 1):
+                    sheet[ox + x, y] = fills[t]
+            if 0 < t < 9:
+                dx = ox + (size - 1 - 3 * scale) // 2
+                dy = (size - 1 - 5 * scale) // 2
+                rows = DIGITS[t]
+                for y in range(5 * scale):
+                    row = rows[y // scale]
+                    for x in range(3 * scale):
+                        if row & (4 >> (x // scale)):
+                            sheet[dx + x, dy + y] = _DIGIT
+        return sheet
+
+    def update(self):
+        board = self.board
+        n = board.take_dirty()
+        for k in range(n):
+            i = board.dirty[k]
+            self.grid[i % board.width, i // board.width] = board.tile(i)
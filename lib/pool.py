@@ -0,0 +1,112 @@
+# Reusable displayio objects. Apps take groups, rectangles, circles and
+# labels from the pool instead of making new ones, and the registry hands
+# everything back when the app exits. Made objects are kept, grouped by
+# type and size (rectangles by width and height, circles by radius,
+# labels by font), so the next app gets the same memory back rather than
+# carving new blocks out of the heap between whatever it left behind.
+#
+# Pooled shapes and labels must only be put in pooled groups: release()
+# takes them out of those, and a layer still in some other group can't be
+# reused. Layers the pool didn't hand out are left where they are, and a
+# group still holding any isn't kept.
+import displayio
+
+class Pool:
+    def __init__(self, keep=8):
+        # Most spare objects kept of each kind
+        self.keep = keep
+        self.free = {}
+        self.taken = []
+        self.made = 0
+        self.reused = 0
+
+    def _take(self, key):
+        spare = self.free.get(key)
+        if spare:
+            self.reused += 1
+            obj = spare.pop()
+        else:
+            obj = None
+        return obj
+
+    def _out(self, key, obj):
+        self.taken.append((key, obj))
+        return obj
+
+    def group(self, x=0, y=0):
+        g = self._take('group')
+        if g is None:
+            self.made += 1
+            g = displayio.Group()
+        g.x = x
+        g.y = y
+        g.hidden = False
+        return self._out('group', g)
+
+    def rect(self, x, y, width, height, fill=None):
+        key = ('rect', width, height)
+        r = self._take(key)
+        if r is None:
+            from adafruit_display_shapes.rect import Rect
+            self.made += 1
+            r = Rect(x, y, width, height, fill=fill)
+        else:
+            r.x = x
+            r.y = y
+            r.fill = fill
+        return self._out(key, r)
+
+    def circle(self, x0, y0, r, fill=None):
+        key = ('circle', r)
+        c = self._take(key)
+        if c is None:
+            from adafruit_display_shapes.circle import Circle
+            self.made += 1
+            c = Circle(x0, y0, r, fill=fill)
+        else:
+            c.x0 = x0
+            c.y0 = y0
+            c.fill = fill
+        return self._out(key, c)
+
+    def label(self, font, text='', x=0, y=0, color=0xFFFFFF):
+        key = ('label', id(font))
+        l = self._take(key)
+        if l is None:
+            from adafruit_display_text.label import Label
+            self.made += 1
+            l = Label(font, text=text, x=x, y=y, color=color)
+        else:
+            l.text = text
+            l.x = x
+            l.y = y
+            l.color = color
+        return self._out(key, l)
+
+    def release(self):
+        # Everything taken goes back, taken out of pooled groups first so
+        # it's free to go in another group
+        taken = self.taken
+        self.taken = []
+        ids = set()
+        for key, obj in taken:
+            ids.add(id(obj))
+        for key, obj in taken:
+            if key == 'group':
+                for i in range(len(obj) - 1, -1, -1):
+                    if id(obj[i]) in ids:
+                        obj.pop(i)
+        for key, obj in taken:
+            if key == 'group' and len(obj):
+                continue
+            spare = self.free.get(key)
+            if spare is None:
+                spare = self.free[key] = []
+            if len(spare) < self.keep:
+                spare.append(obj)
+
+    def spare(self):
+        n = 0
+        for key in self.free:
+            n += len(self.free[key])
+        return n
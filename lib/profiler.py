@@ -0,0 +1,212 @@
+# Opt-in frame profiler. Transactions and bytes are counted by the bus
+# manager (i2cbus.Bus) as they go out, so writes it merges count once;
+# drivers on a plain I2CDevice are wrapped to count them instead. The
+# scheduler reports where each frame starts and ends, and the last frames
+# are kept in fixed size ring buffers.
+# SPI to the display goes through displayio's C core, so only display
+# refreshes can be counted, not bytes.
+import gc
+import time
+from array import array
+from i2cbus import nbytes
+
+try:
+    mem_free = gc.mem_free
+except AttributeError:
+    # Desktop Python: use tracemalloc when it's tracing, otherwise nothing
+    import tracemalloc
+    def mem_free():
+        if tracemalloc.is_tracing():
+            return -tracemalloc.get_traced_memory()[0]
+        return 0
+
+
+# Digits, unit and sign for each number in the overlay, in recent()'s
+# order. Bigger numbers show as all nines. 26 characters fill 156 pixels.
+OVERLAY_FIELDS = ((5, 'us', False), (2, 'tx', False), (4, 'B', False), (5, 'm', True))
+
+
+class CountingDevice:
+    # Stands in for an I2CDevice and tallies every transfer
+    def __init__(self, device, profiler):
+        self.device = device
+        self.profiler = profiler
+
+    def __enter__(self):
+        self.device.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return self.device.__exit__(exc_type, exc_val, exc_tb)
+
+    def _count(self, n):
+        self.profiler.tally(n)
+
+    def readinto(self, buf, *, start=0, end=None):
+        self.device.readinto(buf, start=start, end=end)
+        self._count(nbytes(buf, start, len(buf) if end is None else end))
+
+    def write(self, buf, *, start=0, end=None):
+        self.device.write(buf, start=start, end=end)
+        self._count(nbytes(buf, start, len(buf) if end is None else end))
+
+    def write_then_readinto(self, out_buffer, in_buffer, *,
+            out_start=0, out_end=None, in_start=0, in_end=None):
+        self.device.write_then_readinto(out_buffer, in_buffer,
+            out_start=out_start, out_end=out_end, in_start=in_start, in_end=in_end)
+        self._count(nbytes(out_buffer, out_start, len(out_buffer) if out_end is None else out_end)
+            + nbytes(in_buffer, in_start, len(in_buffer) if in_end is None else in_end))
+
+
+class AppStats:
+    def __init__(self, name):
+        self.name = name
+        self.frames = 0
+        self.total = 0
+        self.worst = 0
+        self.txns = 0
+        self.nbytes = 0
+        self.alloc = 0
+
+
+class Profiler:
+    def __init__(self, size=64, clock=time.monotonic):
+        self.size = size
+        self.clock = clock
+        # Per frame: work time in us, transactions, bytes, heap used
+        self.times = array('L', [0] * size)
+        self.txn_log = array('H', [0] * size)
+        self.byte_log = array('H', [0] * size)
+        self.mem_log = array('l', [0] * size)
+        self.index = 0
+        self.count = 0
+        self.txns = 0
+        self.nbytes = 0
+        self.started = 0
+        self.mem_start = 0
+        # Work time and heap used so far in the frame, over every pass
+        self.work = 0
+        self.used = 0
+        self.apps = {}
+        self.app = self.start_app('boot')
+        self.label = None
+        self.readouts = []
+        self.shown_in = None
+
+    def wrap(self, driver):
+        if driver is None or isinstance(driver.i2c, CountingDevice):
+            return driver
+        bus = getattr(driver.i2c, 'bus', None)
+        if bus is not None:
+            bus.profiler = self
+        else:
+            driver.i2c = CountingDevice(driver.i2c, self)
+        return driver
+
+    def tally(self, n):
+        # One transaction of n bytes
+        self.txns += 1
+        self.nbytes += n
+
+    def start_app(self, name):
+        stats = self.apps.get(name)
+        if stats is None:
+            stats = self.apps[name] = AppStats(name)
+        self.app = stats
+        return stats
+
+    def begin(self):
+        # A scheduler pass starts. Several make up a frame: input polling,
+        # LED and refresh tasks wake the loop between the app's frames.
+        self.mem_start = mem_free()
+        self.started = self.clock()
+
+    def end(self, frame=True):
+        # The pass is over, frame is True if it ran the app's frame task
+        self.work += int((self.clock() - self.started) * 1000000)
+        self.used += self.mem_start - mem_free()
+        if not frame:
+            return
+        us = self.work
+        used = self.used
+        self.work = 0
+        self.used = 0
+        i = self.index
+        self.times[i] = us
+        self.txn_log[i] = min(self.txns, 0xffff)
+        self.byte_log[i] = min(self.nbytes, 0xffff)
+        self.mem_log[i] = used
+        self.index = (i + 1) % self.size
+        if self.count < self.size:
+            self.count += 1
+        app = self.app
+        app.frames += 1
+        app.total += us
+        if us > app.worst:
+            app.worst = us
+        app.txns += self.txns
+        app.nbytes += self.nbytes
+        if used > 0:
+            app.alloc += used
+        self.txns = 0
+        self.nbytes = 0
+
+    def recent(self):
+        # Averages over the frames in the ring buffer
+        n = self.count
+        if not n:
+            return 0, 0, 0, 0
+        t = 0
+        txns = 0
+        nbytes = 0
+        mem = 0
+        for i in range(n):
+            t += self.times[i]
+            txns += self.txn_log[i]
+            nbytes += self.byte_log[i]
+            mem += self.mem_log[i]
+        return t // n, txns // n, nbytes // n, mem // n
+
+    def dump(self, out=print):
+        # CSV over serial: the ring buffer oldest first, then per app totals
+        out("frame_us,txns,bytes,mem")
+        start = self.index if self.count == self.size else 0
+        for k in range(self.count):
+            i = (start + k) % self.size
+            out("%d,%d,%d,%d" % (self.times[i], self.txn_log[i], self.byte_log[i], self.mem_log[i]))
+        out("app,frames,avg_us,worst_us,txns/frame,bytes/frame,alloc/frame")
+        for app in self.apps.values():
+            n = max(app.frames, 1)
+            out("%s,%d,%d,%d,%d,%d,%d" % (app.name, app.frames, app.total // n, app.worst,
+                app.txns // n, app.nbytes // n, app.alloc // n))
+
+    def overlay(self, display, font):
+        # One line readout kept on top of whatever group is showing. The
+        # units are a fixed label, the numbers readout.Readout slots that
+        # only redraw digits that changed.
+        if self.label is None:
+            import displayio
+            from readout import Readout
+            from adafruit_display_text.label import Label
+            self.label = displayio.Group()
+            w = font.get_bounding_box()[0]
+            units = ''
+            for digits, unit, signed in OVERLAY_FIELDS:
+                r = Readout(font, digits, x=len(units) * w, y=75, color=0xFF00FF, signed=signed)
+                self.readouts.append(r)
+                self.label.append(r.grid)
+                units += ' ' * r.width + unit + ' '
+            self.label.append(Label(font, text=units, x=0, y=75, color=0xFF00FF))
+        group = display.root_group
+        if group is not None and group is not self.shown_in:
+            if self.shown_in is not None:
+                try:
+                    self.shown_in.remove(self.label)
+                except ValueError:
+                    # Already taken out, by an app or its pool being released
+                    pass
+            group.append(self.label)
+            self.shown_in = group
+        values = self.recent()
+        for i in range(len(values)):
+            self.readouts[i].set(values[i])
@@ -0,0 +1,97 @@
+# Numbers that change every frame, without Label. A Label lays out and
+# redraws its whole text on every assignment, even to the same string.
+# A Readout is a TileGrid over a strip of the font's digit glyphs, one
+# slot per digit, right aligned. set() works the digits out with integer
+# maths, so no string is made, and only rewrites slots whose digit
+# changed. displayio then only redraws those cells. Setting the colour it
+# already has does nothing.
+import displayio
+
+CHARS = "0123456789- "
+MINUS = 10
+BLANK = 11
+
+# Glyph strips already made, by font
+_strips = {}
+
+def strip(font):
+    # The font's glyphs for CHARS side by side, cut into fixed size
+    # cells. Built once per font and shared by every readout.
+    found = _strips.get(id(font))
+    if found:
+        return found
+    box = font.get_bounding_box()
+    w = box[0]
+    h = box[1]
+    bitmap = displayio.Bitmap(w * len(CHARS), h, 2)
+    for i in range(len(CHARS)):
+        glyph = font.get_glyph(ord(CHARS[i]))
+        if glyph is None:
+            continue
+        src = glyph.bitmap
+        # Built in fonts keep every glyph in one bitmap, tile_index picks it
+        per_row = src.width // glyph.width
+        sx = (glyph.tile_index % per_row) * glyph.width
+        sy = (glyph.tile_index // per_row) * glyph.height
+        for y in range(min(glyph.height, h)):
+            for x in range(min(glyph.width, w)):
+                if src[sx + x, sy + y]:
+                    bitmap[i * w + x, y] = 1
+    found = _strips[id(font)] = (bitmap, w, h)
+    return found
+
+
+class Readout:
+    def __init__(self, font, digits, x=0, y=0, color=0xFFFFFF, signed=False):
+        bitmap, w, h = strip(font)
+        self.digits = digits
+        # Room for a minus sign on top of the digits
+        self.width = digits + (1 if signed else 0)
+        self.limit = 10 ** digits - 1
+        self.palette = displayio.Palette(2)
+        self.palette.make_transparent(0)
+        self.palette[1] = color
+        self._color = color
+        # x, y as for a Label: y is the middle of the text
+        self.grid = displayio.TileGrid(bitmap, pixel_shader=self.palette,
+            width=self.width, height=1, tile_width=w, tile_height=h,
+            default_tile=BLANK, x=x, y=y - h // 2)
+        self.shown = bytearray([BLANK] * self.width)
+        self.value = None
+
+    def _put(self, i, tile):
+        if self.shown[i] != tile:
+            self.shown[i] = tile
+            self.grid[i] = tile
+
+    def set(self, value):
+        if value == self.value:
+            return
+        self.value = value
+        neg = value < 0
+        v = -value if neg else value
+        if v > self.limit:
+            v = self.limit
+        i = self.width - 1
+        while True:
+            self._put(i, v % 10)
+            v //= 10
+            i -= 1
+            if v == 0:
+                break
+        if neg and i >= 0:
+            self._put(i, MINUS)
+            i -= 1
+        while i >= 0:
+            self._put(i, BLANK)
+            i -= 1
+
+    @property
+    def color(self):
+        return self._color
+
+    @color.setter
+    def color(self, color):
+        if color != self._color:
+            self._color = color
+            self.palette[1] = color
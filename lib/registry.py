@@ -0,0 +1,63 @@
+# Apps live in apps/ and are only imported when launched, so boot doesn't
+# pay for modules the user may never open. Each app module has
+# run(ctx, cursor); ctx carries the badge's services (hub, screen,
+# buttons...) and ctx.cache keeps whatever an app wants to find again
+# next time. When the app returns, the displayio objects it took from
+# ctx.pool go back to the pool, every module its import pulled in is
+# dropped from sys.modules and the heap collected, so memory goes back to
+# what the menu needs. Modules named in resident stay once loaded.
+import gc
+import sys
+
+class Context:
+    def __init__(self, **services):
+        for name in services:
+            setattr(self, name, services[name])
+        self.cache = {}
+
+
+class Registry:
+    def __init__(self, ctx, package='apps', clock=None, resident=(), heap=None, out=None):
+        self.ctx = ctx
+        self.package = package
+        self.clock = clock
+        self.resident = resident
+        # Optional heap.Heap, reports each app's heap use
+        self.heap = heap
+        # Where launch diagnostics go, e.g. print; None keeps them quiet
+        self.out = out
+
+    def entry(self, name):
+        # A menu option that launches apps/<name>.py
+        return lambda cursor: self.launch(name, cursor)
+
+    def launch(self, name, cursor=None):
+        module = self.package + '.' + name
+        before = set(sys.modules)
+        if self.heap:
+            self.heap.start_app(name)
+        start = self.clock() if self.clock else 0
+        try:
+            __import__(module)
+            if self.clock and self.out:
+                self.out("%s: imported in %d ms" % (name, (self.clock() - start) * 1000))
+            return sys.modules[module].run(self.ctx, cursor)
+        finally:
+            pool = getattr(self.ctx, 'pool', None)
+            if pool:
+                pool.release()
+            self.unload(before)
+
+    def unload(self, keep):
+        for name in list(sys.modules):
+            if name in keep or name.split('.')[0] in self.resident:
+                continue
+            del sys.modules[name]
+            # The package holds its submodules as attributes too
+            parent, _, child = name.rpartition('.')
+            if parent in sys.modules and hasattr(sys.modules[parent], child):
+                delattr(sys.modules[parent], child)
+        if self.heap:
+            self.heap.end_app(self.out)
+        else:
+            gc.collect()
@@ -0,0 +1,151 @@
+import time
+
+def ticks_ms():
+    return time.monotonic_ns() // 1000000
+
+def ms(seconds):
+    return max(1, int(seconds * 1000 + 0.5))
+
+
+class Task:
+    def __init__(self, fn, period):
+        self.fn = fn
+        # Period and deadline in integer ms
+        self.period = ms(period)
+        self.next = None
+        self.runs = 0
+        self.skipped = 0
+
+    def set_period(self, seconds):
+        self.period = ms(seconds)
+        self.next = None
+
+
+class Scheduler:
+    # Cooperative fixed-timestep loop. Every task has its own period and
+    # deadline; the loop sleeps until the earliest deadline instead of a
+    # fixed delay, so time spent on I2C and display work doesn't make the
+    # frame rate drift. A task that falls more than a whole period behind
+    # skips the missed runs rather than trying to catch up.
+    #
+    # Periods are given in seconds but deadlines are kept in integer ms
+    # from clock(): CircuitPython's floats lose a 10 ms step within hours.
+    def __init__(self, frame=0.025, clock=ticks_ms, sleep=time.sleep):
+        self.frame = frame
+        self.clock = clock
+        self.sleep = sleep
+        self.background = []
+        self.late = []
+        self.tasks = ()
+        self.running = False
+        # Runs of the app's first task, its frame, not every wake-up
+        self.frames = 0
+        self.overruns = 0
+        # Latest a task has run, in ms
+        self.max_late = 0
+        # Optional profiler.Profiler, told where each pass's work starts and
+        # ends and which passes ran the app's frame
+        self.profiler = None
+        # Optional fn(seconds) given the time left before the next deadline,
+        # for work that can wait for a quiet moment (heap.Heap.spare)
+        self.spare = None
+
+    def task(self, fn, period=None):
+        return Task(fn, self.frame if period is None else period)
+
+    def every(self, fn, period=None, after=False):
+        # Background tasks run under every app, before the app's own tasks
+        # (input polling) or with after=True once they're done (display refresh)
+        t = self.task(fn, period)
+        (self.late if after else self.background).append(t)
+        return t
+
+    def cancel(self, task):
+        # Drop a background or late task. Builds new lists, so a task can
+        # cancel itself while tick() is going through them.
+        self.background = [t for t in self.background if t is not task]
+        self.late = [t for t in self.late if t is not task]
+
+    def stop(self):
+        self.running = False
+
+    def run(self, *tasks):
+        saved = (self.tasks, self.running)
+        self.tasks = tasks
+        for t in tasks:
+            t.next = None
+        self.running = True
+        while self.running:
+            self.tick()
+        self.tasks, self.running = saved
+        # The outer app was paused, don't count that as lateness
+        self.resync()
+
+    def resync(self):
+        # Restart every deadline from now after the loop was held up on
+        # purpose (a nested app, light sleep)
+        now = self.clock()
+        for t in self.tasks:
+            t.next = now
+        for t in self.background:
+            t.next = now
+        for t in self.late:
+            t.next = now
+
+    def _step(self, t, now):
+        if t.next is None:
+            t.next = now
+        if now < t.next:
+            return False
+        late = now - t.next
+        if late >= t.period:
+            missed = late // t.period
+            t.skipped += missed
+            t.next += missed * t.period
+            self.overruns += 1
+            if late > self.max_late:
+                self.max_late = late
+        t.runs += 1
+        t.fn()
+        t.next += t.period
+        return True
+
+    def tick(self):
+        if self.profiler:
+            self.profiler.begin()
+        now = self.clock()
+        for t in self.background:
+            self._step(t, now)
+        first = True
+        frame = False
+        for t in self.tasks:
+            if not self.running:
+                break
+            if self._step(t, now) and first:
+                self.frames += 1
+                frame = True
+            first = False
+        # The app's tasks may have taken a while, or run a whole nested app
+        now = self.clock()
+        for t in self.late:
+            self._step(t, now)
+        if self.profiler:
+            self.profiler.end(frame)
+        wake = None
+        for t in self.background:
+            if wake is None or t.next < wake:
+                wake = t.next
+        for t in self.late:
+            if wake is None or t.next < wake:
+                wake = t.next
+        for t in self.tasks:
+            if t.next is not None and (wake is None or t.next < wake):
+                wake = t.next
+        if wake is not None:
+            delay = wake - self.clock()
+            if delay > 0 and self.spare:
+                self.spare(delay / 1000)
+                delay = wake - self.clock()
+            if delay > 0:
+                self.sleep(delay / 1000)
+
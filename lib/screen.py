@@ -0,0 +1,49 @@
+# Drives the display by hand. auto_refresh is turned off and the scheduler
+# calls refresh() once per frame, after the app's tasks, at the frame rate
+# asked for by whatever is showing. However many shapes an app moves in a
+# frame they go out over SPI in one refresh instead of one each.
+#
+# Frames are paced by the scheduler's deadlines and refresh() is called
+# without a target_frames_per_second. With a target, displayio blocks to
+# line up with its own clock and drops the frame outright when called a
+# millisecond late, which a fixed-timestep loop does all the time.
+
+class Screen:
+    def __init__(self, display, fps=30, clock=None):
+        self.display = display
+        # With a clock, first_frame is when the first refresh went out
+        self.clock = clock
+        self.first_frame = None
+        display.auto_refresh = False
+        self.fps = fps
+        self.task = None
+        self.frames = 0
+        self.skipped = 0
+
+    def attach(self, scheduler):
+        self.task = scheduler.every(self.refresh, 1 / self.fps, after=True)
+        return self.task
+
+    def show(self, group, fps=None):
+        self.display.show(group)
+        if fps is not None and fps != self.fps:
+            self.set_fps(fps)
+
+    def set_fps(self, fps):
+        self.fps = fps
+        if self.task:
+            self.task.set_period(1 / fps)
+
+    def refresh(self):
+        self.display.refresh()
+        self.frames += 1
+        if self.first_frame is None and self.clock:
+            self.first_frame = self.clock()
+
+    def missed(self):
+        # Frames the scheduler had to skip because the loop ran late
+        return self.task.skipped - self.skipped if self.task else 0
+
+    def reset(self):
+        self.frames = 0
+        self.skipped = self.task.skipped if self.task else 0
@@ -0,0 +1,147 @@
+import time
+from array import array
+from joystick import Joystick
+from STK8321 import STK8321
+
+# Indexes into SensorHub.joy and SensorHub.accel
+X = 0
+Y = 1
+Z = 2
+BUTTON = 2
+
+class SensorHub:
+    def __init__(self, i2c, joy_rate=40, accel_rate=20, clock=time.monotonic, sleep=time.sleep,
+            accel_bandwidth=15.63, fifo_rate=10, probe=True):
+        self.i2c = i2c
+        self.clock = clock
+        self.sleep = sleep
+        self.accel_bandwidth = accel_bandwidth
+        self.fifo_rate = fifo_rate
+        # Polling rate without a FIFO
+        self.accel_rate = accel_rate
+        # Set by frame_rate(): one read of the newest sample each time
+        # instead of draining the FIFO
+        self.latest = False
+        # Filled in by the probes. With probe=False the caller runs them
+        # later, polling skips a device until it has been found.
+        self.joystick = None
+        self.accelerometer = None
+        # Samples per second the accelerometer produces
+        self.sample_rate = 0
+
+        # Button idles high, 0 means pressed
+        self.joy = array('h', [0, 0, 1])
+        # Smoothed by the accelerometer driver
+        self.accel = array('h', [0, 0, 0])
+        # Joystick rest position, subtracted from every sample
+        self.joy_center = array('h', [0, 0])
+        self.joy_time = None
+        self.accel_time = None
+        self.joy_reads = 0
+        self.accel_reads = 0
+        # Reads that failed even after the bus manager's retries
+        self.errors = 0
+
+        self.set_rates(joy_rate, accel_rate)
+        if probe:
+            self.probe_joystick()
+            self.probe_accelerometer()
+
+    def probe_joystick(self):
+        try:
+            self.joystick = Joystick(self.i2c)
+        except RuntimeError as e:
+            print(e)
+        return self.joystick
+
+    def probe_accelerometer(self):
+        try:
+            accel = STK8321(self.i2c)
+        except RuntimeError as e:
+            print(e)
+            return None
+        # With the FIFO collecting samples, one burst (and a status read)
+        # brings in everything since the last drain. At fifo_rate each
+        # burst carries several samples, apps that draw hub.accel every
+        # frame ask for frame_rate() instead.
+        self.sample_rate = 2 * accel.set_bandwidth(self.accel_bandwidth)
+        if accel.enable_fifo():
+            self.set_rates(accel_rate=self.fifo_rate)
+        self.accelerometer = accel
+        return accel
+
+    def frame_rate(self, rate=None):
+        # hub.accel updated rate times a second with one short read of the
+        # newest sample each, for an app drawing it every frame. The FIFO
+        # and gestures get nothing meanwhile. None goes back to draining.
+        accel = self.accelerometer
+        fifo = accel is not None and accel.fifo
+        if rate:
+            self.latest = fifo
+            self.set_rates(accel_rate=rate)
+            return
+        if self.latest:
+            # Rewriting the mode empties the FIFO of the samples skipped
+            accel.enable_fifo()
+            self.latest = False
+        self.set_rates(accel_rate=self.fifo_rate if fifo else self.accel_rate)
+
+    def set_rates(self, joy_rate=None, accel_rate=None):
+        now = self.clock()
+        if joy_rate is not None:
+            self.joy_period = 1.0 / joy_rate
+            self.joy_next = now
+        if accel_rate is not None:
+            self.accel_period = 1.0 / accel_rate
+            self.accel_next = now
+
+    def poll(self, now=None):
+        if now is None:
+            now = self.clock()
+        if self.joystick and now >= self.joy_next:
+            try:
+                self.read_joystick(now)
+            except OSError:
+                # Keep the last sample, the next poll tries again
+                self.errors += 1
+            self.joy_next += self.joy_period
+            if self.joy_next <= now:
+                self.joy_next = now + self.joy_period
+        if self.accelerometer and now >= self.accel_next:
+            try:
+                self.read_accel(now)
+            except OSError:
+                self.errors += 1
+            self.accel_next += self.accel_period
+            if self.accel_next <= now:
+                self.accel_next = now + self.accel_period
+
+    def read_joystick(self, now=None):
+        self.joystick.readinto(self.joy)
+        self.joy[X] -= self.joy_center[X]
+        self.joy[Y] -= self.joy_center[Y]
+        self.joy_time = self.clock() if now is None else now
+        self.joy_reads += 1
+
+    def calibrate(self, samples=32, delay=0.01):
+        # Average the joystick at rest; the caller makes sure it's released
+        self.joy_center[X] = 0
+        self.joy_center[Y] = 0
+        sx = 0
+        sy = 0
+        for i in range(samples):
+            self.read_joystick()
+            sx += self.joy[X]
+            sy += self.joy[Y]
+            self.sleep(delay)
+        self.joy_center[X] = sx // samples
+        self.joy_center[Y] = sy // samples
+        return self.joy_center[X], self.joy_center[Y]
+
+    def read_accel(self, now=None):
+        if self.accelerometer.readinto_smooth(self.accel, not self.latest):
+            self.accel_time = self.clock() if now is None else now
+        self.accel_reads += 1
+
+    def pressed(self):
+        return self.joystick is not None and not self.joy[BUTTON]
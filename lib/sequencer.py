@@ -0,0 +1,155 @@
+# LED patterns compiled into keyframe tables and played back by a
+# background task. A pattern is a run of keyframes, each a level for every
+# channel it covers and the milliseconds it takes to get to the next one,
+# kept as one bytes object and an array of durations. Playback follows
+# the clock rather than how often tick() gets to run, levels between
+# keyframes are interpolated in 8 bit fixed point and only channels whose
+# level changed go out to the IS31FL3218. Apps start and stop patterns
+# instead of writing LEDs from their own loops.
+from array import array
+
+class Pattern:
+    def __init__(self, channels, levels, durations, loop=True, smooth=True):
+        self.channels = channels
+        # Key k's level for channel c is levels[k * channels + c]
+        self.levels = levels
+        self.durations = durations
+        self.keys = len(durations)
+        self.loop = loop
+        # Fade from key to key, otherwise step
+        self.smooth = smooth
+        self.length = sum(durations)
+
+def compile(keys, loop=True, smooth=True):
+    # From (ms, levels) pairs, every levels the same length
+    channels = len(keys[0][1])
+    levels = bytearray(len(keys) * channels)
+    durations = array('H', [0] * len(keys))
+    for k in range(len(keys)):
+        ms, values = keys[k]
+        durations[k] = max(1, ms)
+        levels[k * channels:(k + 1) * channels] = bytes(values)
+    return Pattern(channels, bytes(levels), durations, loop, smooth)
+
+def record(effect, channels, steps, ms, loop=True, smooth=True):
+    # steps calls of an animation.py effect's step(), ms apart
+    out = bytearray(channels)
+    keys = []
+    for i in range(steps):
+        effect.step(out)
+        keys.append((ms, bytes(out)))
+    return compile(keys, loop, smooth)
+
+def hold(values):
+    # Set the levels once and leave them
+    return compile(((1, values),), False, False)
+
+def sweep(channels, ms=25, level=255):
+    # One channel at a time from first to last, then all off
+    keys = []
+    for i in range(channels + 1):
+        values = bytearray(channels)
+        if i < channels:
+            values[i] = level
+        keys.append((ms, values))
+    return compile(keys, False, False)
+
+
+class Player:
+    def __init__(self, pattern, start, now, key):
+        self.pattern = pattern
+        # First channel the pattern drives
+        self.start = start
+        self.key = key
+        # When the current key began, in ms
+        self.key_start = now
+        self.done = False
+
+
+class Sequencer:
+    def __init__(self, leds=None, clock=None, rate=50):
+        # leds can be filled in later, patterns keep time until then
+        self.leds = leds
+        # Integer ms, like the scheduler's
+        self.clock = clock
+        self.period = 1 / rate
+        self.players = []
+        self.task = None
+
+    def attach(self, scheduler):
+        self.task = scheduler.every(self.tick, self.period)
+        return self.task
+
+    def now(self):
+        return self.clock()
+
+    def play(self, pattern, start=0, key=0):
+        # Replaces whatever was playing on the same channels
+        end = start + pattern.channels
+        players = []
+        for p in self.players:
+            if p.start >= end or p.start + p.pattern.channels <= start:
+                players.append(p)
+        player = Player(pattern, start, self.now(), key % pattern.keys)
+        players.append(player)
+        self.players = players
+        return player
+
+    def stop(self, player=None):
+        # Levels are left as they were, None stops everything
+        if player is None:
+            self.players = []
+        else:
+            self.players = [p for p in self.players if p is not player]
+
+    def playing(self, player):
+        return player in self.players
+
+    def tick(self):
+        if not self.players:
+            return
+        now = self.now()
+        done = False
+        for p in self.players:
+            self.step(p, now)
+            done = done or p.done
+        if self.leds:
+            try:
+                self.leds.show()
+            except OSError:
+                # Changed channels stay dirty and go out next tick
+                pass
+        if done:
+            self.players = [p for p in self.players if not p.done]
+
+    def step(self, p, now):
+        pat = p.pattern
+        d = pat.durations
+        t = now - p.key_start
+        if pat.loop and t >= pat.length:
+            # Held up for longer than the whole pattern, skip round
+            skip = t // pat.length * pat.length
+            p.key_start += skip
+            t -= skip
+        while t >= d[p.key]:
+            if p.key + 1 == pat.keys and not pat.loop:
+                p.done = True
+                break
+            t -= d[p.key]
+            p.key_start += d[p.key]
+            p.key = (p.key + 1) % pat.keys
+        leds = self.leds
+        if not leds:
+            return
+        n = pat.channels
+        levels = pat.levels
+        a = p.key * n
+        if p.done or not pat.smooth or (p.key + 1 == pat.keys and not pat.loop):
+            for i in range(n):
+                leds.set(p.start + i, levels[a + i])
+            return
+        b = (p.key + 1) % pat.keys * n
+        f = t * 256 // d[p.key]
+        for i in range(n):
+            x = levels[a + i]
+            leds.set(p.start + i, x + ((levels[b + i] - x) * f >> 8))
@@ -0,0 +1,208 @@
+# Desktop backend for hal.py: the fake I2C devices from fakebus.py, a
+# 160x80 RGB565 framebuffer and a simulated clock that replays scripted
+# joystick, accelerometer and button input as time advances.
+from fakebus import badge_bus
+from hal import Badge, DISPLAY_WIDTH, DISPLAY_HEIGHT
+
+class SimulationEnd(Exception):
+    pass
+
+
+class SimClock:
+    def __init__(self):
+        self.now = 0.0
+        self.events = []
+        self.limit = None
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.advance(seconds)
+
+    def advance(self, seconds):
+        target = self.now + seconds
+        while self.events and self.events[0][0] <= target:
+            t, fn = self.events.pop(0)
+            self.now = max(self.now, t)
+            fn()
+        self.now = target
+        if self.limit is not None and self.now >= self.limit:
+            raise SimulationEnd()
+
+    def at(self, t, fn):
+        i = len(self.events)
+        while i and self.events[i-1][0] > t:
+            i -= 1
+        self.events.insert(i, (t, fn))
+
+
+class SimPin:
+    def __init__(self, value=True):
+        self.value = value
+
+
+def rgb565(color):
+    return ((color >> 8) & 0xf800) | ((color >> 5) & 0x07e0) | ((color >> 3) & 0x1f)
+
+
+class SimDisplay:
+    def __init__(self, width=DISPLAY_WIDTH, height=DISPLAY_HEIGHT):
+        self.width = width
+        self.height = height
+        self.root_group = None
+        self.auto_refresh = True
+        self.brightness = 1.0
+        self.buffer = bytearray(width * height * 2)
+        self.shows = 0
+        self.refreshes = 0
+
+    def show(self, group):
+        self.root_group = group
+        self.shows += 1
+
+    def refresh(self, *, target_frames_per_second=None, minimum_frames_per_second=0):
+        self.refreshes += 1
+        return True
+
+    def render(self):
+        # Draws the current group into the framebuffer. This walks every
+        # pixel in Python, so it is only done when a test asks for it.
+        for i in range(len(self.buffer)):
+            self.buffer[i] = 0
+        if self.root_group is not None:
+            self._draw(self.root_group, 0, 0, 1)
+        return self.buffer
+
+    def pixel(self, x, y):
+        i = (y * self.width + x) * 2
+        v = self.buffer[i] << 8 | self.buffer[i+1]
+        return ((v & 0xf800) << 8) | ((v & 0x07e0) << 5) | ((v & 0x1f) << 3)
+
+    def save_ppm(self, path):
+        with open(path, 'wb') as f:
+            f.write(b'P6 %d %d 255\n' % (self.width, self.height))
+            for y in range(self.height):
+                for x in range(self.width):
+                    c = self.pixel(x, y)
+                    f.write(bytes(((c >> 16) & 0xff, (c >> 8) & 0xff, c & 0xff)))
+
+    def _plot(self, x, y, scale, color):
+        v = rgb565(color)
+        for dy in range(scale):
+            py = y + dy
+            if py < 0 or py >= self.height:
+                continue
+            for dx in range(scale):
+                px = x + dx
+                if 0 <= px < self.width:
+                    i = (py * self.width + px) * 2
+                    self.buffer[i] = v >> 8
+                    self.buffer[i+1] = v & 0xff
+
+    def _draw(self, layer, ox, oy, scale):
+        if layer.hidden:
+            return
+        if not hasattr(layer, 'tile_width'):
+            x = ox + layer.x * scale
+            y = oy + layer.y * scale
+            s = scale * layer.scale
+            for i in range(len(layer)):
+                self._draw(layer[i], x, y, s)
+            return
+        bitmap = layer.bitmap
+        shader = layer.pixel_shader
+        tw = layer.tile_width
+        th = layer.tile_height
+        per_row = bitmap.width // tw
+        x0 = ox + layer.x * scale
+        y0 = oy + layer.y * scale
+        # adafruit_display_shapes overrides width/height with the size in
+        # pixels, so prefer the desktop displayio's own tile counts.
+        across = getattr(layer, '_width_in_tiles', layer.width)
+        down = getattr(layer, '_height_in_tiles', layer.height)
+        for ty in range(down):
+            for tx in range(across):
+                tile = layer[tx, ty]
+                sx = (tile % per_row) * tw
+                sy = (tile // per_row) * th
+                for py in range(th):
+                    for px in range(tw):
+                        value = bitmap[sx + px, sy + py]
+                        if hasattr(shader, 'is_transparent'):
+                            if shader.is_transparent(value):
+                                continue
+                            color = shader[value]
+                        else:
+                            color = shader.convert(value)
+                        self._plot(x0 + (tx * tw + px) * scale, y0 + (ty * th + py) * scale, scale, color)
+
+
+class Simulator(Badge):
+    def __init__(self):
+        self.clock = SimClock()
+        i2c = badge_bus(self.clock.monotonic)
+        # Let bus transfers take simulated time at the bus clock rate
+        i2c.busy = self.clock.advance
+        super().__init__(i2c, SimDisplay(), SimPin(True), self.clock.monotonic, self.clock.sleep)
+        self.joystick = i2c.devices[0x42]
+        self.accelerometer = i2c.devices[0x0f]
+        self.leds = i2c.devices[0x54]
+
+    def reopen_i2c(self, frequency):
+        self.i2c.frequency = frequency
+        return self.i2c
+
+    def recover_i2c(self):
+        self.i2c.stuck = False
+        return self.i2c
+
+    def glitch(self, t, count=1, stuck=False):
+        # Make the next count transfers after t fail, or all of them until
+        # the bus is recovered
+        def fail():
+            self.i2c.failing = count
+            self.i2c.stuck = stuck
+        self.at(t, fail)
+
+    def run_until(self, t):
+        self.clock.limit = t
+
+    def at(self, t, fn):
+        self.clock.at(t, fn)
+
+    def stick(self, t, x, y):
+        def move():
+            self.joystick.x = x
+            self.joystick.y = y
+        self.at(t, move)
+
+    def press(self, t, duration=0.1):
+        def down():
+            self.joystick.button = 0
+        def up():
+            self.joystick.button = 1
+        self.at(t, down)
+        self.at(t + duration, up)
+
+    def light_sleep(self, seconds):
+        # Jump from event to event, waking early if one changes the pin
+        level = self.button.value
+        end = self.clock.now + seconds
+        while self.clock.now < end:
+            t = self.clock.events[0][0] if self.clock.events else end
+            self.clock.advance(max(0, min(t, end) - self.clock.now))
+            if self.button.value != level:
+                return True
+        return False
+
+    def tilt(self, t, x, y, z):
+        self.at(t, lambda: self.accelerometer.set(x, y, z))
+
+    def pin(self, t, duration=0.1):
+        def down():
+            self.button.value = False
+        def up():
+            self.button.value = True
+        self.at(t, down)
+        self.at(t + duration, up)
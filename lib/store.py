@@ -0,0 +1,187 @@
+# Settings and scores that survive a reset. Values are ints under names of
+# up to four characters, kept as fixed 9 byte records (name, value, check
+# byte) appended to a log in microcontroller.nvm or a file. Reading the
+# log from the start gives every name's latest value, and those are
+# cached in RAM. set() only changes the cache. flush() appends whatever
+# changed since, in one write, and is called when the badge goes idle or
+# an app exits, so flash is never written in the middle of a frame and
+# settings changed several times only cost one record. When the log is
+# full it's compacted: the whole region rewritten with one record per name
+# and 0xff after them, so the appends that follow land on erased bytes
+# (the RP2040's nvm only skips the sector erase when they all are). The
+# check byte includes the log's generation, so records left over from
+# before a compaction end the log, as does erased space: no name starts
+# with 0xff.
+import struct
+
+MAGIC = b'BST1'
+# Magic and generation
+HEADER = '<4sH'
+HEADER_SIZE = struct.calcsize(HEADER)
+# Name, value and check byte
+RECORD = '<4siB'
+RECORD_SIZE = struct.calcsize(RECORD)
+# Records read at a time while loading
+CHUNK = 16
+
+class MemoryBackend:
+    # A region of anything that slices like a bytearray: microcontroller.nvm
+    # on the badge, a plain bytearray for a store that isn't kept
+    def __init__(self, buf, start=0, size=None, persistent=False):
+        self.buf = buf
+        self.start = start
+        self.size = len(buf) - start if size is None else size
+        self.persistent = persistent
+
+    def read(self, offset, n):
+        a = self.start + offset
+        return bytes(self.buf[a:a + n])
+
+    def write(self, offset, data):
+        a = self.start + offset
+        self.buf[a:a + len(data)] = data
+
+
+class FileBackend:
+    # The same layout in a file, made full of 0xff like erased flash
+    def __init__(self, path, size=4096):
+        self.path = path
+        self.size = size
+        self.persistent = True
+        try:
+            open(path, 'rb').close()
+        except OSError:
+            with open(path, 'wb') as f:
+                f.write(b'\xff' * size)
+
+    def read(self, offset, n):
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            data = f.read(n)
+        if len(data) < n:
+            data += b'\xff' * (n - len(data))
+        return data
+
+    def write(self, offset, data):
+        with open(self.path, 'r+b') as f:
+            f.seek(offset)
+            f.write(data)
+
+
+def _name(name):
+    key = name.encode()
+    return key + b' ' * (4 - len(key))
+
+
+class Store:
+    def __init__(self, backend):
+        self.backend = backend
+        self.persistent = backend.persistent
+        # Loaded on first use, so boot doesn't pay for it
+        self.values = None
+        self.dirty = set()
+        self.generation = 0
+        self.end = HEADER_SIZE
+        self.record = bytearray(RECORD_SIZE)
+        self.writes = 0
+        self.written = 0
+        self.compactions = 0
+
+    def check(self, rec):
+        total = self.generation + 0x5a
+        for i in range(RECORD_SIZE - 1):
+            total += rec[i]
+        return total & 0xff
+
+    def name(self, chunk, i):
+        # The record's name, None where the log ends: erased space (its
+        # check byte can happen to match), a bad check or a name that
+        # isn't text
+        if chunk[i] == 0xff:
+            return None
+        if chunk[i + RECORD_SIZE - 1] != self.check(memoryview(chunk)[i:i + RECORD_SIZE]):
+            return None
+        try:
+            return bytes(chunk[i:i + 4]).decode().rstrip()
+        except UnicodeError:
+            return None
+
+    def load(self):
+        self.values = {}
+        backend = self.backend
+        magic, generation = struct.unpack(HEADER, backend.read(0, HEADER_SIZE))
+        if magic != MAGIC:
+            self.generation = 0
+            self.compact()
+            return
+        self.generation = generation
+        offset = HEADER_SIZE
+        last = backend.size - RECORD_SIZE
+        while offset <= last:
+            n = min(CHUNK, (last - offset) // RECORD_SIZE + 1)
+            chunk = backend.read(offset, n * RECORD_SIZE)
+            for i in range(0, n * RECORD_SIZE, RECORD_SIZE):
+                name = self.name(chunk, i)
+                if name is None:
+                    self.end = offset + i
+                    return
+                self.values[name] = struct.unpack_from(RECORD, chunk, i)[1]
+            offset += n * RECORD_SIZE
+        self.end = offset
+
+    def get(self, name, default=None):
+        if self.values is None:
+            self.load()
+        return self.values.get(name, default)
+
+    def set(self, name, value):
+        if self.values is None:
+            self.load()
+        if self.values.get(name) != value:
+            self.values[name] = value
+            self.dirty.add(name)
+
+    def pack_into(self, buf, offset, name):
+        struct.pack_into(RECORD, buf, offset, _name(name), self.values[name], 0)
+        buf[offset + RECORD_SIZE - 1] = self.check(memoryview(buf)[offset:offset + RECORD_SIZE])
+
+    def flush(self):
+        # Appends the changed values, returns True if anything was written
+        if not self.dirty:
+            return False
+        size = len(self.dirty) * RECORD_SIZE
+        if self.end + size > self.backend.size:
+            self.compact()
+            return True
+        if size == RECORD_SIZE:
+            buf = self.record
+        else:
+            buf = bytearray(size)
+        offset = 0
+        for name in self.dirty:
+            self.pack_into(buf, offset, name)
+            offset += RECORD_SIZE
+        self.backend.write(self.end, buf)
+        self.end += size
+        self.dirty = set()
+        self.writes += 1
+        self.written += size
+        return True
+
+    def compact(self):
+        # Header, one record per name and the rest erased, in a single
+        # write. The new generation invalidates whatever is left over.
+        self.generation = (self.generation + 1) & 0xffff
+        names = list(self.values)
+        buf = bytearray(b'\xff' * self.backend.size)
+        struct.pack_into(HEADER, buf, 0, MAGIC, self.generation)
+        offset = HEADER_SIZE
+        for name in names:
+            self.pack_into(buf, offset, name)
+            offset += RECORD_SIZE
+        self.backend.write(0, buf)
+        self.end = offset
+        self.dirty = set()
+        self.writes += 1
+        self.written += len(buf)
+        self.compactions += 1
@@ -0,0 +1,47 @@
+# Boot timeline. mark() notes the time and heap in use after each step of
+# start up, report() prints them with the time to the first display
+# refresh and the highest heap use seen. CircuitPython has no heap peak
+# counter, so the peak is the largest of the samples.
+import gc
+import time
+
+try:
+    mem_used = gc.mem_alloc
+except AttributeError:
+    # Desktop Python: tracemalloc's count when it's tracing, otherwise nothing
+    import tracemalloc
+    def mem_used():
+        if tracemalloc.is_tracing():
+            return tracemalloc.get_traced_memory()[0]
+        return 0
+
+
+class Timeline:
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.start = clock()
+        self.names = []
+        self.times = []
+        self.heap = []
+        self.peak = 0
+        # Set by whoever sees the first frame go out
+        self.first_frame = None
+
+    def sample(self):
+        used = mem_used()
+        if used > self.peak:
+            self.peak = used
+        return used
+
+    def mark(self, name):
+        self.names.append(name)
+        self.times.append(self.clock() - self.start)
+        self.heap.append(self.sample())
+
+    def report(self, out=print):
+        out("boot step,ms,heap")
+        for i in range(len(self.names)):
+            out("%s,%d,%d" % (self.names[i], self.times[i] * 1000, self.heap[i]))
+        if self.first_frame is not None:
+            out("first frame %d ms" % ((self.first_frame - self.start) * 1000))
+        out("peak heap %d B" % self.peak)
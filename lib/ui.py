@@ -0,0 +1,96 @@
+# Pieces the menu and the apps share: joystick cursor and step repeat,
+# text centring and the frame rates for plain screens.
+from hal import DISPLAY_WIDTH, DISPLAY_HEIGHT
+from sensorhub import X, Y
+
+JOY_MIN = -512
+JOY_MAX = 512
+
+# Display refreshes per second for menus and text screens
+MENU_FPS = 20
+TEXT_FPS = 10
+# Period of the input handling task in apps run by the scheduler
+INPUT_DELAY = 0.05
+
+CURSOR_DEAD_ZONE = 40
+CURSOR_RATE = 5
+
+class Cursor:
+    # Position is kept in 8.8 fixed point so slow deflections still add up
+    # to movement. Speed follows a curve that is mostly quadratic, giving
+    # fine control near the centre and full speed at the edge. The pointer
+    # shape is only made when an app asks for it.
+    def __init__(self, hub):
+        self.hub = hub
+        self.x = DISPLAY_WIDTH // 2
+        self.y = DISPLAY_HEIGHT // 2
+        self.fx = self.x << 8
+        self.fy = self.y << 8
+        self.size = 3
+        self.ptr = None
+        self.rate = CURSOR_RATE
+        self.dead_zone = CURSOR_DEAD_ZONE
+
+    def pointer(self):
+        if self.ptr is None:
+            from adafruit_display_shapes.circle import Circle
+            self.ptr = Circle(self.x, self.y, self.size, fill=0xFFFFFF)
+        return self.ptr
+
+    def speed(self, v):
+        # Joystick value to 8.8 pixels per update
+        mag = abs(v) - self.dead_zone
+        if mag <= 0:
+            return 0
+        span = JOY_MAX - self.dead_zone
+        t = min(mag, span) * 256 // span
+        curve = (t + 3 * (t * t >> 8)) >> 2
+        return self.rate * curve if v > 0 else -self.rate * curve
+
+    def update(self):
+        pos = self.hub.joy
+        self.fx = max(0, min(self.fx + self.speed(pos[X]), DISPLAY_WIDTH << 8))
+        self.fy = max(0, min(self.fy + self.speed(pos[Y]), DISPLAY_HEIGHT << 8))
+        x = self.fx >> 8
+        y = self.fy >> 8
+        if x != self.x or y != self.y:
+            self.x = x
+            self.y = y
+            if self.ptr is not None:
+                self.ptr.x0 = self.x - self.size
+                self.ptr.y0 = self.y - self.size
+
+
+class Repeat:
+    # Turns a joystick axis into discrete steps. Holding the stick past the
+    # threshold repeats the step, getting faster the longer it is held.
+    def __init__(self, threshold=JOY_MAX//2, delay=0.4, interval=0.2, fastest=0.05):
+        self.threshold = threshold
+        self.delay = delay
+        self.interval = interval
+        self.fastest = fastest
+        self.dir = 0
+        self.next = 0
+        self.wait = interval
+
+    def step(self, value, now):
+        if value >= self.threshold:
+            d = 1
+        elif value <= -self.threshold:
+            d = -1
+        else:
+            self.dir = 0
+            return 0
+        if d != self.dir:
+            self.dir = d
+            self.wait = self.interval
+            self.next = now + self.delay
+            return d
+        if now >= self.next:
+            self.wait = max(self.fastest, self.wait * .75)
+            self.next = now + self.wait
+            return d
+        return 0
+
+def center_offset(text):
+    return (DISPLAY_WIDTH - len(text) * 6) // 2
@@ -0,0 +1,79 @@
+# Load and full-screen refresh time for each asset, decoded into RAM by
+# lib/assets.py and streamed with OnDiskBitmap. On the badge, copy this
+# next to code.py and `import bench_assets` from the REPL; it reads
+# /assets/*.bim and the matching /*.bmp. On desktop the simulator's
+# refresh is a no-op, so only the load times mean anything there:
+#
+#   python tools/bench_assets.py assets/ .
+import sys
+import time
+import os
+
+if sys.implementation.name != 'circuitpython':
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lib'))
+
+import displayio
+import hal
+from assets import Assets
+
+REFRESHES = 10
+
+try:
+    ticks = time.monotonic_ns
+except AttributeError:
+    ticks = lambda: int(time.monotonic() * 1000000000)
+
+def ms(ns):
+    return ns / 1000000
+
+def refresh_time(display, bitmap, shader):
+    # Nudging the grid a pixel dirties its whole area every refresh
+    grid = displayio.TileGrid(bitmap, pixel_shader=shader)
+    group = displayio.Group()
+    group.append(grid)
+    display.show(group)
+    display.refresh()
+    start = ticks()
+    for i in range(REFRESHES):
+        grid.x = i & 1
+        display.refresh()
+    elapsed = ticks() - start
+    group.remove(grid)
+    return elapsed // REFRESHES
+
+def main(root='/assets', bmp_dir=''):
+    display = hal.init().display
+    display.auto_refresh = False
+    cache = Assets(root)
+    print("asset,load_ms,cached_ms,refresh_ms,disk_load_ms,disk_refresh_ms")
+    for entry in sorted(os.listdir(root)):
+        if not entry.endswith('.bim'):
+            continue
+        name = entry[:-4]
+        start = ticks()
+        bitmap, shader = cache.load(name)
+        load = ticks() - start
+        start = ticks()
+        cache.load(name)
+        cached = ticks() - start
+        refresh = refresh_time(display, bitmap, shader)
+        cache.evict(name)
+        bitmap = shader = None
+        # -1 when there is no BMP to compare with
+        disk_load = disk_refresh = -1000000
+        bmp = "%s/%s.bmp" % (bmp_dir, name)
+        try:
+            start = ticks()
+            bitmap, shader = cache.load_on_disk(bmp)
+            disk_load = ticks() - start
+            disk_refresh = refresh_time(display, bitmap, shader)
+        except (OSError, ValueError) as e:
+            print(e)
+        print("%s,%.2f,%.3f,%.2f,%.2f,%.2f" % (name, ms(load), ms(cached), ms(refresh),
+            ms(disk_load), ms(disk_refresh)))
+    display.auto_refresh = True
+
+if sys.implementation.name != 'circuitpython' and __name__ == '__main__':
+    main(*sys.argv[1:3])
+elif sys.implementation.name == 'circuitpython':
+    main()
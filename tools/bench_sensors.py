@@ -0,0 +1,76 @@
+# Heap allocated per sensor read, run from the repo root with desktop
+# Python:  python tools/bench_sensors.py
+#
+# "kept" is the memory held by what each call returns. Results are kept
+# alive so CPython's free lists can't hide them. "scratch" is the peak of
+# temporaries freed before the call returns. The drivers talk to
+# lib/fakebus.py; a bare transfer of the same size is measured first and
+# subtracted so only the driver's own allocations show.
+import os
+import sys
+import tracemalloc
+from array import array
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lib'))
+
+from fakebus import badge_bus
+from joystick import Joystick
+from STK8321 import STK8321
+
+CALLS = 1000
+
+def kept_per_call(fn):
+    keep = [None] * CALLS
+    fn()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    for i in range(CALLS):
+        keep[i] = fn()
+    grown = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    return grown // CALLS
+
+def peak_per_call(fn):
+    fn()
+    tracemalloc.start()
+    worst = 0
+    for i in range(CALLS):
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        fn()
+        worst = max(worst, tracemalloc.get_traced_memory()[1] - base)
+    tracemalloc.stop()
+    return worst
+
+def main():
+    i2c = badge_bus()
+    i2c.devices[0x42].set(120, -40)
+    i2c.devices[0x0f].set(-300, 20, 1000)
+    joy = Joystick(i2c)
+    accel = STK8321(i2c)
+    out = array('h', [0, 0, 0])
+    raw = bytearray(6)
+
+    def joy_bus():
+        with joy.i2c:
+            joy.i2c.readinto(raw)
+
+    def accel_bus():
+        with accel.i2c:
+            accel.i2c.write_then_readinto(b'\x02', raw)
+
+    joy_base = peak_per_call(joy_bus)
+    accel_base = peak_per_call(accel_bus)
+    rows = (
+        ("Joystick.getPos", joy.getPos, joy_base),
+        ("Joystick.getRawData", joy.getRawData, joy_base),
+        ("Joystick.readinto", lambda: joy.readinto(out), joy_base),
+        ("STK8321.get_values", accel.get_values, accel_base),
+        ("STK8321.readinto", lambda: accel.readinto(out), accel_base),
+    )
+    print("%-22s %6s %8s" % ("call", "kept", "scratch"))
+    for name, fn, base in rows:
+        print("%-22s %6d %8d" % (name, kept_per_call(fn), max(0, peak_per_call(fn) - base)))
+
+if __name__ == '__main__':
+    main()
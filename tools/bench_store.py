@@ -0,0 +1,66 @@
+# Exercises lib/store.py on a file the size of the badge's nvm store,
+# run from the repo root with desktop Python:
+#
+#   python tools/bench_store.py [--path /tmp/bench.store] [--sessions 500]
+#
+# Each session changes a few settings several times and flushes once, as
+# a run of an app does. Prints the time per flush and per load, how many
+# writes and bytes went to the backend, how often the log was compacted,
+# and checks every value reads back after a reload.
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lib'))
+
+from store import Store, FileBackend, MemoryBackend, RECORD_SIZE
+
+NAMES = ('EYEC', 'RLSP', 'MSIZ', 'MDEN', 'MP0', 'MW0', 'MP1', 'MW1', 'JCX', 'JCY')
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--path', help='file to keep the store in, RAM if not given')
+    parser.add_argument('--sessions', type=int, default=500)
+    parser.add_argument('--size', type=int, default=4096)
+    args = parser.parse_args()
+
+    if args.path:
+        if os.path.exists(args.path):
+            os.remove(args.path)
+        backend = FileBackend(args.path, args.size)
+    else:
+        backend = MemoryBackend(bytearray(b'\xff' * args.size), persistent=True)
+
+    store = Store(backend)
+    expect = {}
+    changes = 0
+    flush_time = 0
+    for session in range(args.sessions):
+        for i in range(random.randint(1, 8)):
+            name = random.choice(NAMES[:4 + session % 6])
+            value = random.randint(-1000, 1000)
+            store.set(name, value)
+            expect[name] = value
+            changes += 1
+        t = time.perf_counter()
+        store.flush()
+        flush_time += time.perf_counter() - t
+
+    t = time.perf_counter()
+    loaded = Store(backend)
+    bad = [n for n in expect if loaded.get(n) != expect[n]]
+    load_time = time.perf_counter() - t
+
+    print("store             %d B, %d B records, %s" % (backend.size, RECORD_SIZE,
+        args.path or 'RAM'))
+    print("changes           %d over %d sessions" % (changes, args.sessions))
+    print("writes            %d, %d B, %d compactions" % (store.writes, store.written, store.compactions))
+    print("one record each   would be %d writes, %d B" % (changes, changes * RECORD_SIZE))
+    print("flush             %.1f us average" % (flush_time / args.sessions * 1e6))
+    print("load              %.1f us, log at %d of %d B" % (load_time * 1e6, loaded.end, backend.size))
+    print("read back         %s" % ("ok" if not bad else "MISMATCH " + ", ".join(bad)))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+# Converts BMPs to the .bim format lib/assets.py loads: header, RGB palette
+# and one palette index per pixel, zlib compressed unless --raw. Images
+# with more than 255 colours have to be reduced first.
+#
+#   python tools/convert_assets.py eyebg.bmp -o assets/
+#   python tools/convert_assets.py sprite.bmp -o assets/ --transparent 0xff00ff
+import argparse
+import os
+import struct
+import sys
+import zlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lib'))
+
+import assets
+
+def read_bmp(path):
+    # Uncompressed 1/4/8 bit paletted or 16/24/32 bit BMPs, returns
+    # (width, height, rows of 0xRRGGBB)
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data[:2] != b'BM':
+        raise ValueError("%s is not a BMP" % path)
+    offset = struct.unpack_from('<I', data, 10)[0]
+    header_size, width, height, planes, bpp, compression = struct.unpack_from('<IiiHHI', data, 14)
+    colors_used = struct.unpack_from('<I', data, 46)[0] if header_size >= 40 else 0
+    top_down = height < 0
+    height = abs(height)
+    masks = None
+    if compression == 3:
+        masks = struct.unpack_from('<III', data, 54 if header_size == 40 else 40 + 14)
+    elif compression != 0:
+        raise ValueError("%s is compressed, save it uncompressed" % path)
+    palette = []
+    if bpp <= 8:
+        count = colors_used or 1 << bpp
+        at = 14 + header_size
+        for i in range(count):
+            b, g, r = data[at + i*4:at + i*4 + 3]
+            palette.append(r << 16 | g << 8 | b)
+    stride = (width * bpp + 31) // 32 * 4
+    rows = []
+    for y in range(height):
+        at = offset + (y if top_down else height - 1 - y) * stride
+        row = []
+        for x in range(width):
+            if bpp <= 8:
+                bit = x * bpp
+                v = data[at + bit // 8] >> (8 - bpp - bit % 8) & ((1 << bpp) - 1)
+                row.append(palette[v])
+            elif bpp == 24:
+                b, g, r = data[at + x*3:at + x*3 + 3]
+                row.append(r << 16 | g << 8 | b)
+            else:
+                v = struct.unpack_from('<H' if bpp == 16 else '<I', data, at + x * bpp // 8)[0]
+                if masks is None:
+                    masks = (0x7c00, 0x03e0, 0x001f) if bpp == 16 else (0xff0000, 0xff00, 0xff)
+                row.append(channel(v, masks[0]) << 16 | channel(v, masks[1]) << 8 | channel(v, masks[2]))
+        rows.append(row)
+    return width, height, rows
+
+def channel(v, mask):
+    shift = (mask & -mask).bit_length() - 1
+    top = mask >> shift
+    return ((v & mask) >> shift) * 255 // top
+
+def convert(path, out_dir, transparent=None, raw=False):
+    width, height, rows = read_bmp(path)
+    colors = []
+    index = {}
+    pixels = bytearray(width * height)
+    i = 0
+    for row in rows:
+        for c in row:
+            n = index.get(c)
+            if n is None:
+                n = index[c] = len(colors)
+                colors.append(c)
+            pixels[i] = n if n < 255 else 0
+            i += 1
+    if len(colors) > 255:
+        raise ValueError("%s has %d colours, reduce it to 255 or fewer" % (path, len(colors)))
+    t = assets.NO_TRANSPARENT
+    if transparent is not None:
+        t = index.get(transparent, assets.NO_TRANSPARENT)
+    compression = assets.RAW if raw else assets.ZLIB
+    body = bytes(pixels) if raw else zlib.compress(bytes(pixels), 9)
+    name = os.path.splitext(os.path.basename(path))[0]
+    out = os.path.join(out_dir, name + '.bim')
+    with open(out, 'wb') as f:
+        f.write(struct.pack(assets.HEADER, assets.MAGIC, width, height, len(colors), t, compression))
+        for c in colors:
+            f.write(bytes((c >> 16, c >> 8 & 0xff, c & 0xff)))
+        f.write(body)
+    in_ram = assets.bitmap_size(width, height, len(colors))
+    print("%s: %dx%d, %d colours, %d -> %d bytes, %d bytes in RAM" % (
+        out, width, height, len(colors), os.path.getsize(path), os.path.getsize(out), in_ram))
+    return out
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('bmp', nargs='+')
+    parser.add_argument('-o', '--out', default='.', help='directory for the .bim files')
+    parser.add_argument('--transparent', type=lambda s: int(s, 0), help='0xRRGGBB colour to make transparent')
+    parser.add_argument('--raw', action='store_true', help="don't compress, loads without a scratch buffer")
+    args = parser.parse_args()
+    os.makedirs(args.out, exist_ok=True)
+    for path in args.bmp:
+        convert(path, args.out, args.transparent, args.raw)
+
+if __name__ == '__main__':
+    main()
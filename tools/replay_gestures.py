@@ -0,0 +1,107 @@
+# Runs accelerometer traces through lib/gestures.py and prints what it
+# detects. A trace is x,y,z lines in sensor counts (1024 per g at +-2g),
+# optionally starting with "# rate=62.5". Record one on the badge with
+#
+#   accel.listener = gestures.Recorder()
+#
+# and copy the lines off the serial console. --synth makes up a trace for
+# one gesture to check the thresholds against.
+#
+#   python tools/replay_gestures.py trace.csv
+#   python tools/replay_gestures.py --synth shake --save shake.csv
+import argparse
+import math
+import os
+import random
+import sys
+from array import array
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lib'))
+
+import gestures
+
+# Samples per driver batch, roughly what an 8 Hz drain of the FIFO brings
+BATCH = 8
+
+def load(path):
+    rate = 62.5
+    samples = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith('#'):
+                if 'rate=' in line:
+                    rate = float(line.split('rate=')[1])
+                continue
+            if line:
+                samples.append(tuple(int(v) for v in line.split(',')))
+    return rate, samples
+
+def synth(kind, rate=62.5, seconds=2.0):
+    # Flat on the table with a little noise, the gesture half a second in
+    n = int(rate * seconds)
+    start = int(rate * 0.5)
+    out = []
+    for i in range(n):
+        t = (i - start) / rate
+        x = random.randint(-8, 8)
+        y = random.randint(-8, 8)
+        z = 1024 + random.randint(-8, 8)
+        if kind == 'tap' and i == start:
+            z += 600
+        elif kind == 'double' and i in (start, start + int(rate * 0.2)):
+            z += 600
+        elif kind == 'shake' and 0 <= t < 0.8:
+            x += int(1500 * math.sin(2 * math.pi * 5 * t))
+        elif kind == 'tilt' and t >= 0:
+            a = min(t / 0.3, 1) * 0.6
+            y += int(1024 * math.sin(a))
+            z = int(z * math.cos(a))
+        elif kind == 'flip' and t >= 0:
+            a = min(t / 0.5, 1) * math.pi
+            x += int(1024 * math.sin(a))
+            z = int(1024 * math.cos(a))
+        out.append((max(-2048, min(x, 2047)), max(-2048, min(y, 2047)), max(-2048, min(z, 2047))))
+    return out
+
+def replay(samples, rate):
+    g = gestures.Gestures(rate)
+    seen = []
+    for kind in range(1, len(gestures.NAMES)):
+        g.on(kind, lambda k: seen.append((g.n, k)))
+    buf = array('h', [0] * (BATCH * 3))
+    for at in range(0, len(samples), BATCH):
+        batch = samples[at:at + BATCH]
+        for i, (x, y, z) in enumerate(batch):
+            # The driver hands over left aligned 12 bit values
+            buf[i*3] = x << 4
+            buf[i*3+1] = y << 4
+            buf[i*3+2] = z << 4
+        g.feed(buf, len(batch))
+        g.dispatch()
+    return seen
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('trace', nargs='?')
+    parser.add_argument('--synth', choices=('tap', 'double', 'shake', 'tilt', 'flip', 'still'))
+    parser.add_argument('--rate', type=float, default=62.5)
+    parser.add_argument('--save', help='write the synthesised trace here')
+    args = parser.parse_args()
+    if args.synth:
+        rate = args.rate
+        samples = synth(args.synth, rate)
+        if args.save:
+            with open(args.save, 'w') as f:
+                f.write("# rate=%g\n" % rate)
+                for s in samples:
+                    f.write("%d,%d,%d\n" % s)
+    elif args.trace:
+        rate, samples = load(args.trace)
+    else:
+        parser.error('give a trace or --synth')
+    for n, kind in replay(samples, rate):
+        print("%7.3f s  %s" % (n / rate, gestures.NAMES[kind]))
+
+if __name__ == '__main__':
+    main()
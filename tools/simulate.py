@@ -0,0 +1,136 @@
+# Runs one badge app on the desktop simulator and reports frame rate, I2C
+# traffic and memory. Time is simulated, I2C transfers take as long as
+# they would at the bus clock.
+#
+#   python tools/simulate.py eyes --seconds 10
+#   python tools/simulate.py menu --ppm menu.ppm
+#
+# Needs the desktop displayio stack: adafruit-blinka-displayio,
+# adafruit-circuitpython-display-text and -display-shapes.
+import argparse
+import importlib.util
+import os
+import sys
+import time
+import tracemalloc
+
+# lib/ only has .mpy builds of these, load the desktop packages first
+import adafruit_display_shapes.circle
+import adafruit_display_shapes.rect
+import adafruit_display_text.label
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'lib'))
+# For the apps package, on the badge code.py's folder is on the path
+sys.path.insert(0, ROOT)
+
+import hal
+from simulator import SimulationEnd
+
+DEVICES = {0x42: 'joystick', 0x0f: 'STK8321', 0x54: 'IS31FL3218'}
+
+def load_badge():
+    spec = importlib.util.spec_from_file_location('badge_code', os.path.join(ROOT, 'code.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def default_script(sim, t0, seconds):
+    # Wiggle the stick and tilt the badge, short press half way through
+    # and long press at the end so the app exits on its own.
+    step = 0.5
+    t = t0
+    i = 0
+    while t < t0 + seconds - 1:
+        sim.stick(t, (i % 3 - 1) * 300, ((i // 3) % 3 - 1) * 300)
+        sim.tilt(t, (i % 5 - 2) * 400, (i % 7 - 3) * 300, 1024)
+        t += step
+        i += 1
+    sim.stick(t, 0, 0)
+    sim.press(t0 + seconds / 2, 0.1)
+    sim.press(t0 + seconds - 0.8, 0.6)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('app', help='menu or a module in apps/: eyes, mines, running_light, color_shifter...')
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--ppm', help='save the last frame to this file')
+    parser.add_argument('--profile', action='store_true', help='dump the frame profiler afterwards')
+    args = parser.parse_args()
+    if args.profile:
+        os.environ['BADGE_PROFILE'] = 'serial'
+
+    sim = hal.init('simulator')
+    tracemalloc.start()
+    badge = load_badge()
+    if args.app != 'menu':
+        # Probe the devices now rather than while the app is being measured,
+        # the menu goes through boot as it would on the badge
+        badge.finish_boot()
+    boot = sim.clock.now
+    boot_mem = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+
+    if args.app == 'menu':
+        app = badge.main_menu.run
+    else:
+        app = badge.registry.entry(args.app)
+        if badge.profiler:
+            badge.profiler.start_app(args.app)
+    default_script(sim, boot, args.seconds)
+    # Leave a little slack for the app to see the long press
+    sim.run_until(boot + args.seconds + 1)
+
+    i2c = sim.i2c
+    before = {a: list(t) for a, t in i2c.traffic.items()}
+    frames = badge.scheduler.frames
+    overruns = badge.scheduler.overruns
+    badge.screen.reset()
+    wall = time.perf_counter()
+    try:
+        app(badge.Cursor(badge.hub))
+    except SimulationEnd:
+        print("app still running when the simulation ended")
+    # As the menu does after an app, BADGE_STORE=file keeps it between runs
+    badge.store.flush()
+    wall = time.perf_counter() - wall
+    elapsed = sim.clock.now - boot
+    # Per second rates, 0 for an app that returned straight away
+    per_second = 1 / elapsed if elapsed else 0
+    frames = badge.scheduler.frames - frames
+    current, peak = tracemalloc.get_traced_memory()
+
+    print("boot              %.3f s simulated" % boot)
+    print("ran               %.3f s simulated, %.3f s wall" % (elapsed, wall))
+    if frames:
+        print("frames            %d (%.1f fps)" % (frames, frames * per_second))
+    else:
+        print("frames            none from the scheduler, see display refreshes")
+    print("overruns          %d, worst %d ms late" % (badge.scheduler.overruns - overruns, badge.scheduler.max_late))
+    print("display           %d show, %d refresh, %d missed at %d fps" % (
+        sim.display.shows, sim.display.refreshes, badge.screen.missed(), badge.screen.fps))
+    for address, (count, nbytes) in sorted(i2c.traffic.items()):
+        count -= before.get(address, (0, 0))[0]
+        nbytes -= before.get(address, (0, 0))[1]
+        print("i2c %-13s %d transactions, %d bytes, %.0f B/s" % (
+            DEVICES.get(address, hex(address)), count, nbytes, nbytes * per_second))
+    inputs = badge.inputs
+    if inputs.handled:
+        print("input latency     %.1f ms average, %.1f ms worst over %d presses" % (
+            inputs.latency_total / inputs.handled * 1000, inputs.latency_max * 1000, inputs.handled))
+    print("memory            %d B after boot, peak +%d B, now +%d B" % (boot_mem, peak - boot_mem, current - boot_mem))
+    pool = badge.ctx.pool
+    print("pool              %d made, %d reused, %d spare" % (pool.made, pool.reused, pool.spare()))
+    print("gc                %d collects, worst %d us" % (badge.heap.collects, badge.heap.worst))
+
+    badge.i2c.report(names=DEVICES)
+
+    if badge.profiler:
+        badge.profiler.dump()
+
+    if args.ppm:
+        sim.display.render()
+        sim.display.save_ppm(args.ppm)
+
+if __name__ == '__main__':
+    main()